@@ -3,8 +3,11 @@
 A space game.
 
 """
-from spacegame.app import SpaceGameApp
 
 if __name__ == "__main__":
     """Run the application when the script is executed."""
+    # Simulation worker processes import this module again, so only the
+    # game itself loads the app.
+    from spacegame.app import SpaceGameApp
+
     SpaceGameApp().run()
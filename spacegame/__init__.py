@@ -1,3 +1,11 @@
-"""Configure Kivy and help Kivy find some modules by importing them here."""
-from spacegame import config
-from spacegame import screens
+"""The Spaced Out! game.
+
+The `spacegame.simulation` package never imports Kivy so combat can be
+simulated without a window. Import `spacegame.app` to configure Kivy and run
+the game.
+
+"""
+from time import perf_counter
+
+# When the game started loading, for timing how long startup takes.
+started = perf_counter()
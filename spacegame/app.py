@@ -7,10 +7,27 @@ Run the application by importing the `SpaceGameApp` class and calling its
     SpaceGameApp().run()
 
 """
+import csv
+import gc
+from datetime import datetime
+from os import makedirs, path
+from time import perf_counter
+
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.window import Keyboard, Window
 from kivy.lang import Builder
 from kivy.logger import Logger
-from kivy.properties import StringProperty
+from kivy.properties import ObjectProperty, StringProperty
+
+import spacegame
+from spacegame import config  # Add the resource paths before loading kv.
+from spacegame import screens  # Register the screens with Kivy's Factory.
+from spacegame import tracing
+from spacegame.archetypes import DIFFICULTIES
+from spacegame.assets import Preloader
+from spacegame.backgrounds import BackgroundCache
+from spacegame.managers import MusicManager
 
 
 class SpaceGameApp(App):
@@ -18,20 +35,106 @@ class SpaceGameApp(App):
 
     Attributes:
         difficulty (str): The game's current level of difficulty.
+        preloader (Preloader): Loads the game's assets during the intro.
+        timings (dict): The seconds from starting until the game could be
+            played ("interactive") and until every asset had loaded
+            ("preloaded").
 
     """
     difficulty = StringProperty('medium')
+    preloader = ObjectProperty(None)
 
 
     def build(self):
         """Build the app and return an app object that can be run."""
         Logger.info('Application: Kivy has finally finished loading.')
+        MusicManager.prefetch('Intro')  # Load it while the screens build.
+        self.timings = {}
+        self.preloader = Preloader(workers=config.preload['workers'])
+        self.preloader.bind(done=self.on_preloaded)
         Logger.info('Application: Building "Spaced Out!" so you can run it...')
         presentation = Builder.load_file("app.kv")
         Logger.info('Application: ...Built. Run it by calling `self.run()`.')
+        tracing.dump_on_crash(path.join(config.paths['traces'], 'crash.txt'))
+        Window.bind(on_keyboard=self.on_keyboard)
+        Window.bind(on_memorywarning=self.on_memorywarning)
         self.set_difficulty(difficulty='medium')
         return presentation
 
+    def on_start(self):
+        """Start preloading and time when the first frame is drawn."""
+        self.preloader.start()
+        Clock.schedule_once(self.on_interactive)
+
+    def on_interactive(self, dt):
+        """Record how long the game took to become playable."""
+        self.timings['interactive'] = perf_counter() - spacegame.started
+        Logger.info('Application: Interactive {:.2f}s after starting.'.format(
+            self.timings['interactive']
+            ))
+
+    def on_preloaded(self, preloader, done):
+        """Record how long the game took to load every asset."""
+        self.timings['preloaded'] = perf_counter() - spacegame.started
+        Logger.info('Application: Preloaded {:.2f}s after starting.'.format(
+            self.timings['preloaded']
+            ))
+        if config.profiling['export']:
+            self.export_timings()
+        self.root.prewarm(config.navigation['prewarm'])
+
+    def export_timings(self):
+        """Add this session's startup timings to startup.csv."""
+        filename = path.join(config.paths['profiles'], 'startup.csv')
+        makedirs(config.paths['profiles'], exist_ok=True)
+        new = not path.exists(filename)
+        with open(filename, 'a', newline='') as output:
+            writer = csv.writer(output)
+            if new:
+                writer.writerow(('date', 'interactive', 'preloaded', 'assets'))
+            writer.writerow((
+                datetime.now().isoformat(timespec='seconds'),
+                round(self.timings.get('interactive', 0), 3),
+                round(self.timings['preloaded'], 3),
+                self.preloader.total,
+                ))
+
+    def on_memorywarning(self, window):
+        """Throw away the screens and textures that aren't in use."""
+        released = self.root.release_unused()
+        BackgroundCache.textures.clear()
+        gc.collect()
+        Logger.warning('Application: Low on memory, released {}.'.format(
+            ', '.join(released) or 'nothing'
+            ))
+
+    def on_keyboard(self, window, key, *args):
+        """Dump the recent trace events when the trace key is pressed."""
+        if key != Keyboard.keycodes[config.tracing['key']]:
+            return False
+        filename = tracing.dump(path.join(
+            config.paths['traces'],
+            datetime.now().strftime('trace-%Y%m%d-%H%M%S.txt'),
+            ))
+        Logger.info('Application: Recent events written to "{}".'.format(
+            filename
+            ))
+        return True
+
+    def on_stop(self):
+        """Export the combat frame timings if they're being kept."""
+        if not config.profiling['export']:
+            return
+        profiler = screens.CombatScreen.profiler
+        files = profiler.export(config.paths['profiles'])
+        profiler.frames.clear()  # Kivy can stop the app more than once.
+        if files is not None:
+            Logger.info(
+                'Application: Frame timings written to "{}" and "{}".'.format(
+                    *files
+                    )
+                )
+
     def set_difficulty(self, difficulty='medium'):
         """Set the level of difficulty.
 
@@ -39,7 +142,10 @@ class SpaceGameApp(App):
             difficulty (str): The difficulty level to run the game at.
 
         """
+        if difficulty not in DIFFICULTIES:
+            raise KeyError('"{}" is not a difficulty.'.format(difficulty))
         Logger.info(
             'Application: '
             'Setting the game difficulty to "{}".'.format(difficulty)
             )
+        self.difficulty = difficulty
@@ -0,0 +1,259 @@
+"""Compile the data modules into read only archetypes once, at startup.
+
+The modules in spacegame/data are plain dicts that are easy to edit, but
+looking a value up in them means a `getattr` and a couple of dict lookups,
+and every body used to copy its stats dict when it loaded. Instead, each
+entry is checked against a schema and compiled into an `Archetype` when this
+module is imported, so a mistake in the data fails at startup instead of
+halfway through a round. Archetypes are shared by every body of their type,
+can't be changed, and keep their stats as attributes. For example::
+
+    from spacegame import archetypes
+    from spacegame.data.ships import hostiles
+
+    basic = archetypes.lookup(hostiles, 'basic')
+    basic.stats.speed  # 5
+    basic.difficulties['hard'].speed  # 10
+
+This module never imports Kivy.
+
+"""
+from types import MappingProxyType
+
+from spacegame.data.objects import collectables, explodables, obstacles
+from spacegame.data.ships import hostiles, players
+from spacegame.data.weapons import hostiles as hostile_weapons
+from spacegame.data.weapons import players as player_weapons
+
+# The difficulty levels a dataset can scale its stats by.
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# The keys each kind of entry must have and the types of their values.
+# Entries can leave out the keys in `OPTIONAL`.
+SCHEMAS = {
+    'item': {'skin': str, 'type': str},
+    'obstacle': {'radius': (int, float), 'skin': str, 'states': dict},
+    'ship': {
+        'radius': (int, float),
+        'skin': str,
+        'states': dict,
+        'stats': dict,
+        'weapons': str,
+        },
+    'weapon': {'radius': (int, float), 'sfx': str, 'skin': str, 'stats': dict},
+    }
+OPTIONAL = {'angle': (int, float), 'sfx': str, 'speed': (int, float)}
+
+
+class Frozen:
+    """A base for objects whose attributes can't change once they're set."""
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '{} is read only.'.format(self.__class__.__name__)
+            )
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            '{} is read only.'.format(self.__class__.__name__)
+            )
+
+
+class Stats(Frozen):
+    """The numbers that describe how well a ship or weapon performs.
+
+    Attributes:
+        ammo (float): The ship's capacity to carry ammunition.
+        attack (float): The ship's effectiveness at doing damage.
+        hp (float): The damage the ship can sustain.
+        recharge (float): The seconds a weapon takes to recharge.
+        speed (float): The top speed of a ship or the speed of a shell.
+
+    """
+
+    __slots__ = ('ammo', 'attack', 'hp', 'recharge', 'speed')
+
+    def __repr__(self):
+        return '<Stats {}>'.format(', '.join(
+            '{}={}'.format(name, getattr(self, name))
+            for name in self.__slots__
+            if getattr(self, name) is not None
+            ))
+
+    def scaled(self, modifier):
+        """Return a copy of the stats multiplied by a modifier."""
+        return Stats(**{
+            name: getattr(self, name) * modifier
+            for name in self.__slots__
+            if getattr(self, name) is not None
+            })
+
+
+class Archetype(Frozen):
+    """Everything a type of body or widget loads from its dataset.
+
+    Attributes:
+        angle (float): The heading bodies of this type start with.
+        dataset (obj): The data module the archetype was compiled from.
+        difficulties (dict): The stats scaled by each of the dataset's
+            difficulty modifiers, keyed by difficulty. Empty if the dataset
+            has no modifiers.
+        kind (str): The schema the entry was checked against, e.g. "ship".
+        name (str): The entry's key in the dataset.
+        radius (float): The radius of the circle that shells hit, in
+            pixels, or None if the type can't be hit.
+        sfx (str): The sound the type makes, if any.
+        skin (str): The type's image without the path.
+        speed (float): The speed bodies of this type start with.
+        states (dict): The skins and sounds used for other states, e.g. when
+            the body has exploded.
+        stats (Stats): The unmodified stats, or None if the type has none.
+        weapons (str): The key of the ship's weapons in the weapons dataset.
+
+    """
+
+    __slots__ = (
+        'angle', 'dataset', 'difficulties', 'kind', 'name', 'radius', 'sfx',
+        'skin', 'speed', 'states', 'stats', 'weapons',
+        )
+
+    def __repr__(self):
+        return '<Archetype "{}.{}">'.format(
+            self.dataset.__name__.rsplit('.', 1)[-1], self.name
+            )
+
+
+def freeze(states):
+    """Return a read only copy of an entry's states."""
+    return MappingProxyType({
+        state: MappingProxyType(dict(values))
+        for state, values in states.items()
+        })
+
+
+def validate(entry, kind, where):
+    """Check an entry against the schema for its kind.
+
+    Raises:
+        ValueError: If a key is missing or a value has the wrong type.
+
+    """
+    schema = SCHEMAS[kind]
+    for key in schema:
+        if key not in entry:
+            raise ValueError('{} is missing "{}".'.format(where, key))
+    for key, value in entry.items():
+        expected = schema.get(key, OPTIONAL.get(key))
+        if expected is None:
+            raise ValueError('{} has an unknown key "{}".'.format(where, key))
+        if not isinstance(value, expected):
+            raise ValueError('{}["{}"] should not be {!r}.'.format(
+                where, key, value
+                ))
+
+    for state, values in entry.get('states', {}).items():
+        if 'skin' not in values:
+            raise ValueError('{} state "{}" is missing "skin".'.format(
+                where, state
+                ))
+    for stat, value in entry.get('stats', {}).items():
+        if stat not in Stats.__slots__:
+            raise ValueError('{} has an unknown stat "{}".'.format(
+                where, stat
+                ))
+        if not isinstance(value, (int, float)):
+            raise ValueError('{} stat "{}" should not be {!r}.'.format(
+                where, stat, value
+                ))
+
+
+def compile_dataset(dataset, kind):
+    """Check and compile every entry in a data module.
+
+    Module level numbers in the dataset named after a difficulty are
+    modifiers; every entry's stats are scaled by each of them.
+
+    Args:
+        dataset (obj): The data module to compile.
+        kind (str): The key in `SCHEMAS` to check the entries against.
+
+    Returns:
+        dict: The archetypes keyed by name.
+
+    """
+    modifiers = {
+        difficulty: getattr(dataset, difficulty)
+        for difficulty in DIFFICULTIES
+        if hasattr(dataset, difficulty)
+        }
+    compiled = {}
+    for name, entry in vars(dataset).items():
+        if name.startswith('_') or not isinstance(entry, dict):
+            continue
+        validate(entry, kind, '{}.{}'.format(dataset.__name__, name))
+
+        stats = None
+        if 'stats' in entry:
+            stats = Stats(**entry['stats'])
+        compiled[name] = Archetype(
+            angle=entry.get('angle', 0),
+            dataset=dataset,
+            difficulties=MappingProxyType({
+                difficulty: stats.scaled(modifier)
+                for difficulty, modifier in modifiers.items()
+                } if stats is not None else {}),
+            kind=kind,
+            name=name,
+            radius=entry.get('radius'),
+            sfx=entry.get('sfx'),
+            skin=entry['skin'],
+            speed=entry.get('speed', 0),
+            states=freeze(entry.get('states', {})),
+            stats=stats,
+            weapons=entry.get('weapons'),
+            )
+    return compiled
+
+
+# Every archetype, keyed by the data module and then by name.
+archetypes = {
+    dataset: compile_dataset(dataset, kind)
+    for dataset, kind in (
+        (collectables, 'item'),
+        (explodables, 'item'),
+        (obstacles, 'obstacle'),
+        (players, 'ship'),
+        (hostiles, 'ship'),
+        (player_weapons, 'weapon'),
+        (hostile_weapons, 'weapon'),
+        )
+    }
+
+# Check that every ship's weapons exist.
+for ships, weapons in ((players, player_weapons), (hostiles, hostile_weapons)):
+    for archetype in archetypes[ships].values():
+        if archetype.weapons not in archetypes[weapons]:
+            raise ValueError('{!r} has unknown weapons "{}".'.format(
+                archetype, archetype.weapons
+                ))
+
+
+def lookup(dataset, name):
+    """Return the archetype compiled from an entry in a data module.
+
+    Raises:
+        KeyError: If the dataset has no entry with that name.
+
+    """
+    try:
+        return archetypes[dataset][name]
+    except KeyError:
+        raise KeyError('"{}" is not a key in `{}`.'.format(
+            name, dataset.__name__.rsplit('.', 1)[-1]
+            )) from None
@@ -0,0 +1,228 @@
+"""List every asset the game uses and load them before they're needed.
+
+Images and sounds used to be loaded one at a time the first time they were
+used, so the first shot or explosion of a session hitched. The manifest
+lists every image, background and sound effect named in `spacegame.config`
+and the archetypes compiled from the `spacegame.data` modules, and the
+`Preloader` decodes them on a thread pool while the intro screen is showing.
+Only the texture uploads happen on the UI thread.
+
+Music is not preloaded here, it is streamed in by `MusicManager`.
+
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os import path
+from time import perf_counter
+
+from kivy.cache import Cache
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage
+from kivy.core.image import ImageLoader
+from kivy.core.window import Window
+from kivy.event import EventDispatcher
+from kivy.logger import Logger
+from kivy.properties import AliasProperty, BooleanProperty, NumericProperty
+from kivy.resources import resource_find
+
+from spacegame import atlas
+from spacegame.archetypes import archetypes
+from spacegame.backgrounds import BackgroundCache
+from spacegame.config import screens
+from spacegame.data.objects import obstacles
+from spacegame.data.ships import hostiles, players
+from spacegame.data.weapons import hostiles as hostile_weapons
+from spacegame.data.weapons import players as player_weapons
+from spacegame.managers import SoundManager
+
+datasets = (obstacles, players, hostiles, player_weapons, hostile_weapons)
+
+# The textures preloaded for images outside the atlases, by file name.
+textures = {}
+
+
+def manifest():
+    """Return every asset the game uses.
+
+    Returns:
+        dict: Sorted lists of "images", "atlases", "backgrounds" and
+        "sounds". Images are the files not packed into an atlas and
+        atlases are the atlas:// urls of one sprite in each atlas.
+
+    """
+    skins, sounds, backgrounds = set(), set(), set()
+    for dataset in datasets:
+        for archetype in archetypes[dataset].values():
+            skins.add(archetype.skin)
+            if archetype.sfx is not None:
+                sounds.add(archetype.sfx)
+            for state in archetype.states.values():
+                skins.add(state['skin'])
+                if 'sfx' in state:
+                    sounds.add(state['sfx'])
+
+    for screen in screens.values():
+        backgrounds.update(screen['bg'])
+        if 'killed' in screen:
+            skins.add(screen['killed'])
+
+    images, atlases = set(), {}
+    for skin in skins:
+        source = atlas.resolve(skin)
+        if source.startswith('atlas://'):
+            atlases.setdefault(source.rsplit('/', 1)[0], source)
+        else:
+            images.add(source)
+
+    return {
+        'images': sorted(images),
+        'atlases': sorted(atlases.values()),
+        'backgrounds': sorted(backgrounds),
+        'sounds': sorted(sounds),
+        }
+
+
+def texture(source):
+    """Return the texture for an image, preloaded if possible."""
+    try:
+        return textures[source]
+    except KeyError:
+        return CoreImage(resource_find(source)).texture
+
+
+def image_key(filename):
+    """Return the key Kivy caches a file's decoded image under."""
+    return '{}|0|0'.format(filename)
+
+
+def atlas_pages(url):
+    """Return the image files of the atlas a sprite's url belongs to."""
+    index = resource_find(url[len('atlas://'):].rsplit('/', 1)[0] + '.atlas')
+    with open(index) as pages:
+        pages = json.load(pages)
+    return [path.join(path.dirname(index), page) for page in pages]
+
+
+class Preloader(EventDispatcher):
+    """Decode the assets in a manifest on a thread pool.
+
+    Bind to `progress` or `done` to follow along. For example::
+
+        preloader = Preloader()
+        preloader.bind(done=lambda instance, done: print('Ready!'))
+        preloader.start()
+
+    Args:
+        workers (int): The number of threads to decode with.
+
+    Attributes:
+        done (bool): True once everything has loaded.
+        elapsed (float): The seconds the preload took, once it's done.
+        loaded (int): The number of assets loaded so far.
+        progress (float): The fraction of the assets loaded, from 0 to 1.
+        total (int): The number of assets to load.
+
+    """
+
+    done = BooleanProperty(False)
+    loaded = NumericProperty(0)
+    total = NumericProperty(0)
+
+    def get_progress(self):
+        return self.loaded / self.total if self.total else float(self.done)
+
+    progress = AliasProperty(get_progress, bind=('loaded', 'total', 'done'))
+
+    def __init__(self, workers=4, **kwargs):
+        super().__init__(**kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.elapsed = None
+        self.pages = {}
+        self.started = None
+
+    def start(self, assets=None):
+        """Start loading every asset in a manifest.
+
+        Args:
+            assets (dict): The manifest to load. Defaults to `manifest()`.
+
+        """
+        assets = assets or manifest()
+        self.started = perf_counter()
+
+        jobs = []
+        for source in assets['images']:
+            filename = resource_find(source)
+            jobs.append((ImageLoader.load, filename, self.add_image, source))
+        for url in assets['atlases']:
+            pages = atlas_pages(url)
+            self.pages[url] = len(pages)
+            for page in pages:
+                jobs.append((ImageLoader.load, page, self.add_page, url))
+        for source in assets['sounds']:
+            jobs.append(
+                (SoundManager.load_voices, source, self.add_sound, source)
+                )
+        self.total = len(jobs) + len(assets['backgrounds'])
+        Logger.info('Assets: Preloading {} assets.'.format(self.total))
+
+        for load, argument, handler, source in jobs:
+            future = self.executor.submit(load, argument)
+            future.add_done_callback(partial(
+                self.schedule, handler, argument, source
+                ))
+        for source in assets['backgrounds']:
+            BackgroundCache.load(source, Window.size, self.add_background)
+
+    def schedule(self, handler, argument, source, future):
+        """Hand a decoded asset over to the UI thread."""
+        Clock.schedule_once(
+            lambda dt: self.finish(handler, argument, source, future)
+            )
+
+    def finish(self, handler, argument, source, future):
+        """Add a decoded asset on the UI thread."""
+        try:
+            handler(future.result(), argument, source)
+        except Exception as error:
+            Logger.error('Assets: Failed to preload "{}": {}'.format(
+                argument, error
+                ))
+        self.count()
+
+    def add_image(self, image, filename, source):
+        """Upload an image outside the atlases."""
+        Cache.append('kv.image', image_key(filename), image)
+        textures[source] = image.texture
+
+    def add_page(self, image, filename, url):
+        """Upload an atlas page and build its atlas once every page is in.
+
+        Kivy loads the atlas's pages from its image cache, so the atlas is
+        built from the decoded pages and kept for the rest of the session.
+
+        """
+        Cache.append('kv.image', image_key(filename), image)
+        self.pages[url] -= 1
+        if not self.pages[url]:
+            CoreImage(url)
+
+    def add_sound(self, tracks, argument, source):
+        """Add a sound effect's voices, keeping them for the session."""
+        SoundManager.add_voices(source, tracks).subscribers[self] = self
+
+    def add_background(self, texture):
+        """Count a background once it's uploaded or has failed to load."""
+        self.count()
+
+    def count(self):
+        """Count an asset as loaded and finish once they all are."""
+        self.loaded += 1
+        if self.loaded == self.total:
+            self.elapsed = perf_counter() - self.started
+            self.executor.shutdown(wait=False)
+            Logger.info('Assets: Preloaded {} assets in {:.2f}s.'.format(
+                self.total, self.elapsed
+                ))
+            self.done = True
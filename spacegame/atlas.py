@@ -0,0 +1,92 @@
+"""Pack the gameplay sprites into texture atlases.
+
+When every sprite is part of one big texture, changing a body's skin (for
+example to the explosion) only changes which part of the texture is drawn,
+and every sprite is decoded when the atlas is first used instead of when the
+sprite first appears. Build the atlases after changing any of the sprites::
+
+    python3 -m spacegame.atlas
+
+Once built, skins from the data modules are looked up in the atlases
+automatically. Skins that aren't in an atlas load from their own files.
+
+"""
+import json
+from glob import glob
+from os import makedirs, path
+
+from kivy.logger import Logger
+
+from spacegame.config import atlas, paths
+
+# The atlas:// url of every packed sprite keyed by its file name. None until
+# the atlas index has been read.
+regions = None
+
+
+def sources():
+    """Return the image files to pack, each listed once."""
+    files = []
+    for pattern in atlas['sprites']:
+        files.extend(sorted(glob(path.join(paths['images'], pattern))))
+    return list(dict.fromkeys(files))
+
+
+def filename():
+    """Return the atlas index file's path."""
+    return path.join(paths['atlas'], '{}.atlas'.format(atlas['name']))
+
+
+def build():
+    """Pack the sprites into atlas pages and write the atlas index."""
+    from kivy.atlas import Atlas
+
+    makedirs(paths['atlas'], exist_ok=True)
+    files = sources()
+    Logger.info('Atlas: Packing {} sprites.'.format(len(files)))
+    outname = path.join(paths['atlas'], atlas['name'])
+    result = Atlas.create(outname, files, atlas['size'])
+    if not result:
+        raise RuntimeError('The sprites could not be packed.')
+
+    global regions
+    regions = None  # Read the new index next time.
+    Logger.info('Atlas: Wrote "{}".'.format(result[0]))
+    return result
+
+
+def load():
+    """Read the atlas index, returning the urls of the packed sprites."""
+    global regions
+    regions = {}
+    try:
+        with open(filename()) as index:
+            pages = json.load(index)
+    except FileNotFoundError:
+        Logger.info('Atlas: No atlas, loading sprites from their files.')
+        return regions
+
+    base = path.splitext(filename())[0]
+    for page in pages.values():
+        for key in page:
+            regions[key + '.png'] = 'atlas://{}/{}'.format(base, key)
+    Logger.info('Atlas: Loaded {} sprites.'.format(len(regions)))
+    return regions
+
+
+def resolve(skin):
+    """Return where to load a skin from, preferring its atlas region.
+
+    Args:
+        skin (str): The image file name used in the data modules.
+
+    """
+    try:
+        return regions.get(skin, skin)
+    except AttributeError:  # The index hasn't been read yet.
+        return load().get(skin, skin)
+
+
+if __name__ == '__main__':
+    """Build the atlases when the module is run as a script."""
+    build()
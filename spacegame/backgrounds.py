@@ -0,0 +1,214 @@
+"""Show screen backgrounds at the window's size without stalling the UI.
+
+The background images are large PNGs. Decoding one at full size on the UI
+thread stalls the screen switch, so each background is scaled down to the
+window's size once, cached on disk and decoded on a worker thread. A
+background is drawn in a plain placeholder colour until its image is ready.
+
+"""
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os import makedirs, path, replace, stat
+from random import choice
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics.texture import Texture
+from kivy.logger import Logger
+from kivy.properties import ListProperty
+from kivy.resources import resource_find
+from kivy.uix.image import Image
+from PIL import Image as PILImage
+
+from spacegame.config import paths
+
+
+class BackgroundCache:
+    """Scale, cache and decode backgrounds on a worker thread.
+
+    Attributes:
+        digests (dict): The content hash of each source file, keyed by the
+            file's path, modification time and size.
+        executor (ThreadPoolExecutor): The worker that scales and decodes.
+        keep (int): The number of textures to keep in memory.
+        textures (OrderedDict): The most recently used textures keyed by
+            source file and size.
+
+    """
+
+    digests = {}
+    executor = ThreadPoolExecutor(max_workers=1)
+    keep = 8
+    textures = OrderedDict()
+
+    @classmethod
+    def load(cls, source, size, callback):
+        """Call back on the UI thread with a source's texture at a size.
+
+        Args:
+            source (str): The image to load, e.g. "space1.png".
+            size (tuple): The width and height to scale the image down to.
+            callback (callable): Called with the texture once it's ready,
+                or with None if the image couldn't be loaded.
+
+        """
+        filename = resource_find(source)
+        if filename is None:
+            Logger.error('Backgrounds: Cannot find "{}".'.format(source))
+            callback(None)
+            return
+
+        key = (filename, tuple(size))
+        try:
+            texture = cls.textures[key]
+        except KeyError:
+            future = cls.executor.submit(cls.decode, filename, key[1])
+            future.add_done_callback(
+                lambda future: Clock.schedule_once(
+                    partial(cls.upload, key, future, callback)
+                    )
+                )
+        else:
+            cls.textures.move_to_end(key)
+            callback(texture)
+
+    @classmethod
+    def digest(cls, filename):
+        """Return a hash of a file's contents, hashing each version once."""
+        info = stat(filename)
+        key = (filename, info.st_mtime, info.st_size)
+        try:
+            return cls.digests[key]
+        except KeyError:
+            with open(filename, 'rb') as source:
+                digest = hashlib.sha1(source.read()).hexdigest()
+            cls.digests[key] = digest
+            return digest
+
+    @classmethod
+    def scaled(cls, filename, size):
+        """Return the path of a copy of an image no bigger than a size.
+
+        The copy is made the first time it is asked for and reused after
+        that, even between sessions.
+
+        """
+        width, height = size
+        with PILImage.open(filename) as image:
+            if image.width <= width and image.height <= height:
+                return filename  # Never scale up.
+
+            cached = path.join(
+                paths['cache'],
+                '{}-{}x{}.png'.format(cls.digest(filename), width, height),
+                )
+            if path.exists(cached):
+                return cached
+
+            Logger.info(
+                'Backgrounds: Scaling "{}" to {}x{}.'.format(
+                    filename, width, height
+                    )
+                )
+            makedirs(paths['cache'], exist_ok=True)
+            image = image.convert('RGBA').resize(size, PILImage.LANCZOS)
+            partial_file = cached + '.part'
+            image.save(partial_file, format='PNG', compress_level=1)
+            replace(partial_file, cached)  # Never leave half a file behind.
+            return cached
+
+    @classmethod
+    def decode(cls, filename, size):
+        """Return the size and RGBA pixels of an image scaled to a size.
+
+        Runs on the worker thread.
+
+        """
+        with PILImage.open(cls.scaled(filename, size)) as image:
+            image = image.convert('RGBA')
+            return image.size, image.tobytes()
+
+    @classmethod
+    def upload(cls, key, future, callback, dt):
+        """Turn decoded pixels into a texture on the UI thread."""
+        try:
+            size, pixels = future.result()
+        except Exception as error:
+            Logger.error(
+                'Backgrounds: Failed to load "{}": {}'.format(key[0], error)
+                )
+            callback(None)
+            return
+
+        texture = Texture.create(size=size, colorfmt='rgba')
+        texture.blit_buffer(pixels, colorfmt='rgba', bufferfmt='ubyte')
+        texture.flip_vertical()
+
+        cls.textures[key] = texture
+        while len(cls.textures) > cls.keep:
+            cls.textures.popitem(last=False)
+        callback(texture)
+
+
+class Background(Image):
+    """A full screen image chosen at random from `sources`.
+
+    The image is loaded in the background at the window's size and reloaded
+    when the window is resized.
+
+    Attributes:
+        placeholder (list): The colour shown until the image is ready.
+        sources (list): The images to choose from.
+
+    """
+
+    placeholder = ListProperty([0.02, 0.02, 0.06, 1])
+    sources = ListProperty()
+
+    def __init__(self, **kwargs):
+        self.chosen = None
+        self.requested = None
+        self.trigger = Clock.create_trigger(self.reload)
+        super().__init__(**kwargs)
+        self.color = self.placeholder
+
+    def on_parent(self, instance, parent):
+        """Follow the window's size only while the image is on screen."""
+        if parent is None:
+            Window.unbind(size=self.on_window_size)
+        else:
+            Window.bind(size=self.on_window_size)
+            self.trigger()
+
+    def on_window_size(self, window, size):
+        """Reload the image at the window's new size."""
+        self.trigger()
+
+    def on_sources(self, instance, sources):
+        """Choose one of the sources and load it."""
+        self.chosen = choice(sources) if sources else None
+        self.trigger()
+
+    def reload(self, *args):
+        """Load the chosen image at the window's current size."""
+        if self.chosen is None:
+            return
+
+        request = (self.chosen, tuple(Window.size))
+        if request == self.requested:
+            return
+        self.requested = request
+        BackgroundCache.load(*request, partial(self.show, request))
+
+    def show(self, request, texture):
+        """Show a loaded texture unless a newer one has been asked for.
+
+        The placeholder stays if the image couldn't be loaded.
+
+        """
+        if request != self.requested or texture is None:
+            return
+        self.texture = texture
+        self.color = (1, 1, 1, 1)
@@ -0,0 +1,347 @@
+"""Play thousands of headless rounds of combat to check the ships' balance.
+
+Tuning the ships in spacegame/data by playing them takes hours and a feel
+for the numbers. This plays rounds with scripted pilots instead, for every
+combination of player ship and difficulty over many seeds, in a pool of
+processes, and reports how each ship fared::
+
+    python3 -m spacegame.balance --seeds 200 --pilot scripted
+    python3 -m spacegame.balance --ships fast tank --difficulties hard \\
+        --levels 1 2 3 --output benchmarks/balance.json
+
+Rounds are deterministic: the AI thinks for every ship every step instead
+of within a time budget, so the same seed always plays out the same way.
+The headline number is the rounds simulated per second on each core.
+Nothing here imports Kivy.
+
+"""
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from math import atan2, degrees, hypot
+from random import Random
+from time import perf_counter
+
+from spacegame.archetypes import DIFFICULTIES, archetypes
+from spacegame.data.ships import players
+from spacegame.simulation.replay import KEYS, build_world
+from spacegame.simulation.waves import levels
+
+SHIPS = tuple(archetypes[players])
+LEVELS = tuple(levels())
+
+# The size of the world rounds are played in.
+SIZE = (800, 600)
+
+# Each pilot, keyed by name. See `pilot()`.
+pilots = {}
+
+
+def pilot(name):
+    """Register a pilot under a name.
+
+    Pilots take the round's random number generator and return a function
+    that is called with the world each step and returns the keys to hold
+    down, as the game's keyboard would.
+
+    """
+    def register(function):
+        pilots[name] = function
+        return function
+
+    return register
+
+
+def centre(body):
+    """Return the centre of a body's hit box."""
+    x, y = body.pos
+    width, height = body.size
+    return x + width / 2, y + height / 2
+
+
+@pilot('random')
+def mash(rng, hold=0.25):
+    """Hold a random set of keys, choosing again every `hold` seconds."""
+    state = {'keys': set(), 'until': 0.0}
+
+    def fly(world):
+        if world.time >= state['until']:
+            state['keys'] = {key for key in KEYS if rng.random() < 0.5}
+            state['until'] = world.time + hold
+        return state['keys']
+
+    return fly
+
+
+@pilot('scripted')
+def hunt(rng, aim=5, reach=250):
+    """Turn towards the nearest hostile ship, or asteroid, and shoot it.
+
+    Args:
+        aim (float): How many degrees off the target's bearing the ship
+            can be before it turns.
+        reach (float): How close to the target the ship flies.
+
+    """
+    def fly(world):
+        ship = world.player
+        targets = world.hostiles or world.asteroids
+        if not targets:
+            return set()
+        x, y = centre(ship)
+        target_x, target_y = min(
+            (centre(target) for target in targets),
+            key=lambda point: hypot(point[0] - x, point[1] - y),
+            )
+        bearing = degrees(atan2(target_y - y, target_x - x))
+        error = (bearing - ship.angle + 180) % 360 - 180
+
+        keys = set()
+        if error > aim:
+            keys.add('a')
+        elif error < -aim:
+            keys.add('d')
+        if abs(error) < 3 * aim:
+            keys.add('spacebar')
+        if hypot(target_x - x, target_y - y) > reach:
+            keys.add('w')
+        else:
+            keys.add('s')
+        return keys
+
+    return fly
+
+
+def play(match):
+    """Play a round of combat until the player dies, wins or runs out of time.
+
+    Args:
+        match (dict): The "ship", "difficulty", "level", "seed", "pilot",
+            "rate" and "duration" in seconds of the round.
+
+    Returns:
+        dict: The round, with how long the player "survived" in seconds,
+        whether they were "killed" or "cleared" the level, their "score",
+        the "shots" they fired and the number of "steps" simulated.
+
+    """
+    settings = {
+        'seed': match['seed'],
+        'physics': {},
+        'difficulty': match['difficulty'],
+        'pool_size': 8,
+        'ai': {},
+        'shiptype': match['ship'],
+        'level': match['level'],
+        'spawn_budget': 2,
+        }
+    world = build_world(settings, SIZE)
+    fly = pilots[match['pilot']](Random(match['seed']))
+    player = world.player
+    dt = 1.0 / match['rate']
+
+    shots = steps = 0
+    cleared = False
+    while world.time < match['duration'] and not player.destroyed:
+        for name, body in world.step(dt, fly(world)):
+            if name == 'fired' and body.origin == 'player':
+                shots += 1
+        steps += 1
+        if player.destroyed:
+            break
+        if not (world.waves or world.hostiles or world.asteroids):
+            cleared = True
+            break
+
+    return dict(
+        match,
+        survived=world.time,
+        killed=player.destroyed,
+        cleared=cleared,
+        score=world.score,
+        shots=shots,
+        steps=steps,
+        )
+
+
+def rounds(ships, difficulties, levels, seeds, pilot, rate, duration):
+    """Return every combination of ship, difficulty, level and seed."""
+    return [
+        {
+            'ship': ship,
+            'difficulty': difficulty,
+            'level': level,
+            'seed': seed,
+            'pilot': pilot,
+            'rate': rate,
+            'duration': duration,
+            }
+        for ship in ships
+        for difficulty in difficulties
+        for level in levels
+        for seed in seeds
+        ]
+
+
+def summarize(results):
+    """Total up the rounds played with each ship at each difficulty.
+
+    Returns:
+        dict: The number of "rounds", the fraction "killed" and "cleared",
+        the mean "survived" seconds, "score" and "shots" and the "hit_rate"
+        of every shot fired, keyed by "ship/difficulty".
+
+    """
+    groups = {}
+    for result in results:
+        key = '{}/{}'.format(result['ship'], result['difficulty'])
+        groups.setdefault(key, []).append(result)
+
+    summary = {}
+    for key, group in groups.items():
+        count = len(group)
+        shots = sum(result['shots'] for result in group)
+        summary[key] = {
+            'rounds': count,
+            'killed': sum(result['killed'] for result in group) / count,
+            'cleared': sum(result['cleared'] for result in group) / count,
+            'survived': sum(result['survived'] for result in group) / count,
+            'score': sum(result['score'] for result in group) / count,
+            'shots': shots / count,
+            'hit_rate': sum(result['score'] for result in group) / (
+                shots or 1
+                ),
+            }
+    return summary
+
+
+def sweep(plan, jobs=None):
+    """Play rounds in a pool of processes.
+
+    Args:
+        plan (list): The rounds to play, see `rounds()`.
+        jobs (int): The number of processes. Defaults to one per core.
+
+    Returns:
+        dict: When and where the sweep ran, the "results" of every round,
+        their "summary" and the "rounds_per_second" on each core used.
+
+    """
+    cpus = os.cpu_count() or 1
+    jobs = max(1, min(jobs or cpus, len(plan)))
+    started = perf_counter()
+    if jobs == 1:
+        results = [play(match) for match in plan]
+    else:
+        with ProcessPoolExecutor(jobs) as pool:
+            chunksize = max(1, len(plan) // (jobs * 8))
+            results = list(pool.map(play, plan, chunksize=chunksize))
+    elapsed = perf_counter() - started
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'jobs': jobs,
+        'cores': min(jobs, cpus),
+        'elapsed': elapsed,
+        'rounds_per_second': len(results) / elapsed / min(jobs, cpus),
+        'simulated': sum(result['survived'] for result in results),
+        'summary': summarize(results),
+        'results': results,
+        }
+
+
+def report(sweep):
+    """Return a sweep's summary as a table."""
+    lines = ['{:<16}{:>8}{:>8}{:>9}{:>10}{:>8}{:>8}{:>8}'.format(
+        'ship', 'rounds', 'killed', 'cleared', 'survived', 'score',
+        'shots', 'hits',
+        )]
+    for key, row in sorted(sweep['summary'].items()):
+        lines.append(
+            '{:<16}{:>8}{:>8.0%}{:>9.0%}{:>9.1f}s{:>8.1f}{:>8.1f}{:>8.0%}'
+            .format(
+                key, row['rounds'], row['killed'], row['cleared'],
+                row['survived'], row['score'], row['shots'], row['hit_rate'],
+                )
+            )
+    lines.append(
+        '{} rounds ({:.0f}s simulated) in {:.1f}s on {} cores: '
+        '{:.1f} rounds/s per core.'.format(
+            len(sweep['results']), sweep['simulated'], sweep['elapsed'],
+            sweep['cores'], sweep['rounds_per_second'],
+            )
+        )
+    return '\n'.join(lines)
+
+
+def main(args=None):
+    """Play headless rounds of combat and report how each ship fared."""
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        '--ships', nargs='+', default=SHIPS, metavar='ship',
+        help='the player ships to fly: {}'.format(', '.join(SHIPS)),
+        )
+    parser.add_argument(
+        '--difficulties', nargs='+', default=DIFFICULTIES,
+        metavar='difficulty',
+        help='the difficulties to play: {}'.format(', '.join(DIFFICULTIES)),
+        )
+    parser.add_argument(
+        '--levels', type=int, nargs='+', default=[1], metavar='level',
+        help='the levels to play: {}'.format(
+            ', '.join(str(level) for level in LEVELS)
+            ),
+        )
+    parser.add_argument(
+        '--seeds', type=int, default=100,
+        help='the number of rounds to play of each combination',
+        )
+    parser.add_argument(
+        '--pilot', choices=sorted(pilots), default='scripted',
+        help='who flies the player ship',
+        )
+    parser.add_argument(
+        '--rate', type=int, default=60, help='the steps simulated a second',
+        )
+    parser.add_argument(
+        '--duration', type=float, default=60,
+        help='the most seconds a round lasts',
+        )
+    parser.add_argument(
+        '--jobs', type=int, default=None,
+        help='the number of processes, one per core by default',
+        )
+    parser.add_argument('--output', help='a file to write every result to')
+    options = parser.parse_args(args)
+
+    unknown = set(options.ships) - set(SHIPS)
+    unknown |= set(options.difficulties) - set(DIFFICULTIES)
+    unknown |= {
+        'level {}'.format(level)
+        for level in set(options.levels) - set(LEVELS)
+        }
+    if unknown:
+        parser.error('unknown ships, difficulties or levels: {}'.format(
+            ', '.join(sorted(unknown))
+            ))
+
+    plan = rounds(
+        options.ships, options.difficulties, options.levels,
+        range(options.seeds), options.pilot, options.rate, options.duration,
+        )
+    results = sweep(plan, options.jobs)
+    print(report(results))
+    if options.output:
+        directory = os.path.dirname(options.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print('Results written to "{}".'.format(options.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
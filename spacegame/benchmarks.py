@@ -0,0 +1,372 @@
+"""Time the hot paths of the combat loop at growing numbers of bodies.
+
+Each benchmark builds a headless world with 10, 100 and 1000 bodies and
+times one operation on it, so every change to the combat loop can come with
+numbers. Results are written as JSON and can be compared with a baseline
+from an earlier run::
+
+    python3 -m spacegame.benchmarks run --output benchmarks/baseline.json
+    # ...change the combat loop...
+    python3 -m spacegame.benchmarks run --output benchmarks/latest.json
+    python3 -m spacegame.benchmarks compare benchmarks/baseline.json \\
+        benchmarks/latest.json
+
+`compare` exits with status 1 if any benchmark got slower than the
+threshold, so it can gate a build. Only the sound effect benchmark imports
+Kivy, and it is skipped if Kivy or an audio provider can't be loaded.
+
+"""
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+from os import makedirs, path
+from statistics import median
+from time import perf_counter
+
+from spacegame.simulation.world import FRAME, World
+
+# The numbers of bodies each benchmark runs with.
+COUNTS = (10, 100, 1000)
+
+# Each benchmark, keyed by name. See `benchmark()`.
+benchmarks = {}
+
+
+class Skipped(Exception):
+    """Raised by a benchmark that can't run on this machine."""
+
+
+def benchmark(function):
+    """Register a benchmark.
+
+    Benchmarks take the number of bodies to run with and return a function
+    to time. They can instead return a (setup, run) tuple; `setup` is called
+    before each timing of `run` and isn't timed, for operations that use up
+    the state they run on. Benchmarks that can't run here raise `Skipped`.
+
+    """
+    benchmarks[function.__name__] = function
+    return function
+
+
+def grid_world(count, size=(4000, 4000), spacing=120):
+    """Return a world with asteroids on a grid so none of them touch."""
+    world = World(size=size, seed=1)
+    columns = size[0] // spacing
+    for index in range(count):
+        row, column = divmod(index, columns)
+        world.spawn_asteroid(pos=(column * spacing, row * spacing))
+    return world
+
+
+def armed_world(count):
+    """Return a world with a player and hostile ships ready to fire."""
+    world = World(size=(4000, 4000), seed=1, pool_size=count)
+    world.spawn_player('basic', pos=(2000, 2000))
+    for index in range(count - 1):
+        world.spawn_hostile('basic', pos=(index * 4 % 4000, index * 7 % 4000))
+    return world
+
+
+def recycle(world):
+    """Take every shell in flight out of play and back to its pool."""
+    for shell in tuple(world.shells):
+        world.remove_shell(shell)
+    world.reap()
+    world.remove_dead()
+    world.events.clear()
+
+
+@benchmark
+def collisions(count):
+    """Find collisions between asteroids and the player's shells in flight.
+
+    Every shell sits still in the gap between four asteroids, so the world
+    is rebuilt before each timing to start with every asteroid in play.
+
+    """
+    state = {}
+
+    def setup():
+        state['world'] = world = grid_world(count)
+        world.spawn_player('basic', pos=(-500, -500))
+        pool = world.shell_pool(world.player)
+        columns = world.size[0] // 120
+        for index in range(count):
+            row, column = divmod(index, columns)
+            shell = pool.acquire()
+            shell.pos = (column * 120 + 60, row * 120 + 60)
+            shell.settle()  # Or it sweeps in from where it was parked.
+            world.track(shell, world.shells)
+
+    def run():
+        state['world'].detect_collisions()
+
+    return setup, run
+
+
+@benchmark
+def movement(count):
+    """Move asteroids along their trajectories, wrapping at the edges."""
+    world = grid_world(count)
+    return lambda: world.move(FRAME)
+
+
+@benchmark
+def ai(count):
+    """Steer hostile ships for a step."""
+    world = armed_world(count)
+
+    def run():
+        world.ai.run(world, FRAME)
+        recycle(world)
+
+    return run
+
+
+@benchmark
+def fire(count):
+    """Fire every ship's weapons and recycle the shells."""
+    world = armed_world(count)
+    ships = [world.player] + world.hostiles
+
+    def run():
+        for ship in ships:
+            ship.lastfired = 1.0
+            world.fire(ship)
+        recycle(world)
+
+    return run
+
+
+@benchmark
+def explosion(count):
+    """Blow up every asteroid in a world, in no particular order."""
+    state = {}
+
+    def setup():
+        state['world'] = world = grid_world(count)
+        state['asteroids'] = list(world.asteroids)
+        world.random.shuffle(state['asteroids'])
+
+    def run():
+        state['world'].explode(*state['asteroids'])
+        state['world'].reap()
+
+    return setup, run
+
+
+@benchmark
+def spawn_asteroid(count):
+    """Spawn asteroids away from the player."""
+    state = {}
+
+    def setup():
+        state['world'] = world = World(size=(4000, 4000), seed=1)
+        world.spawn_player('basic')
+
+    def run():
+        spawn = state['world'].spawn_asteroid
+        for index in range(count):
+            spawn()
+
+    return setup, run
+
+
+@benchmark
+def step(count):
+    """Step a world of asteroids and hostile ships forward."""
+    world = grid_world(count // 2)
+    for index in range(count - count // 2):
+        world.spawn_hostile('basic', pos=(index * 9 % 4000, index * 5 % 4000))
+    return lambda: world.step(FRAME)
+
+
+@benchmark
+def sfx(count):
+    """Subscribe bodies to a sound effect and unsubscribe them again."""
+    from spacegame.managers import SoundManager
+
+    voices = SoundManager.load_voices('pew.ogg')
+    if not voices:
+        raise Skipped('No audio provider could load "pew.ogg".')
+    for track in voices:
+        track.unload()
+
+    subscribers = [object() for index in range(count)]
+
+    def run():
+        for subscriber in subscribers:
+            SoundManager.add_sfx('pew.ogg', subscriber)
+        for subscriber in subscribers:
+            SoundManager.remove_sfx('pew.ogg', subscriber)
+
+    return run
+
+
+def measure(function, count, repeat=7, minimum=0.05):
+    """Time a benchmark at one count.
+
+    Returns:
+        dict: The fastest and median microseconds per run, and the number
+        of runs timed.
+
+    """
+    prepared = function(count)
+    setup, run = prepared if isinstance(prepared, tuple) else (None, prepared)
+
+    # Find how many runs fill `minimum` seconds, unless there's a setup.
+    number = 1
+    while setup is None:
+        started = perf_counter()
+        for index in range(number):
+            run()
+        if perf_counter() - started >= minimum:
+            break
+        number *= 2
+
+    samples = []
+    for index in range(repeat):
+        if setup is not None:
+            setup()
+        started = perf_counter()
+        for index in range(number):
+            run()
+        samples.append((perf_counter() - started) / number * 1e6)
+    return {
+        'min': min(samples),
+        'median': median(samples),
+        'runs': number * repeat,
+        }
+
+
+def run(names=None, counts=COUNTS, repeat=7):
+    """Run benchmarks and return their results.
+
+    Args:
+        names (list): The benchmarks to run. Defaults to all of them.
+        counts (tuple): The numbers of bodies to run each one with.
+        repeat (int): The number of timings to take of each.
+
+    Returns:
+        dict: Where and when the benchmarks ran, and a "results" dict of
+        timings keyed by "name/count". Benchmarks that couldn't run are
+        listed in "skipped".
+
+    """
+    results, skipped = {}, {}
+    for name in names or benchmarks:
+        for count in counts:
+            key = '{}/{}'.format(name, count)
+            try:
+                results[key] = measure(benchmarks[name], count, repeat)
+            except (ImportError, Skipped) as error:
+                skipped[key] = str(error)
+                continue
+            print('{:<24}{:>12.1f} us'.format(key, results[key]['median']))
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'results': results,
+        'skipped': skipped,
+        }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Compare two runs' median timings.
+
+    Args:
+        baseline (dict): The results of the earlier run.
+        current (dict): The results of the run to check.
+        threshold (float): How much slower a benchmark can get, as a
+            fraction, before it counts as a regression.
+
+    Returns:
+        list: The (key, baseline, current, ratio) of every regression.
+
+    """
+    regressions = []
+    print('{:<24}{:>12}{:>12}{:>9}'.format(
+        'benchmark', 'baseline', 'current', 'change'
+        ))
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            print('{:<24}{:>12}{:>12.1f}{:>9}'.format(
+                key, '-', result['median'], 'new'
+                ))
+            continue
+        before, after = before['median'], result['median']
+        ratio = after / before
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append((key, before, after, ratio))
+            flag = '  SLOWER'
+        print('{:<24}{:>12.1f}{:>12.1f}{:>+8.0%}{}'.format(
+            key, before, after, ratio - 1, flag
+            ))
+    return regressions
+
+
+def main(args=None):
+    """Run the benchmarks or compare two runs of them."""
+    parser = ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runner = commands.add_parser('run', help='run the benchmarks')
+    runner.add_argument(
+        'names', nargs='*', metavar='name',
+        help='the benchmarks to run, all of them by default: {}'.format(
+            ', '.join(benchmarks)
+            ),
+        )
+    runner.add_argument(
+        '--counts', type=int, nargs='+', default=COUNTS,
+        help='the numbers of bodies to run with',
+        )
+    runner.add_argument('--repeat', type=int, default=7)
+    runner.add_argument(
+        '--output', default=path.join('benchmarks', 'latest.json'),
+        help='where to write the results',
+        )
+
+    comparer = commands.add_parser('compare', help='compare two runs')
+    comparer.add_argument('baseline')
+    comparer.add_argument(
+        'current', nargs='?', default=path.join('benchmarks', 'latest.json'),
+        )
+    comparer.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='the fraction slower that counts as a regression',
+        )
+    options = parser.parse_args(args)
+
+    if options.command == 'run':
+        unknown = set(options.names) - set(benchmarks)
+        if unknown:
+            parser.error('unknown benchmarks: {}'.format(', '.join(unknown)))
+        results = run(options.names, options.counts, options.repeat)
+        directory = path.dirname(options.output)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print('Results written to "{}".'.format(options.output))
+        return 0
+
+    with open(options.baseline) as baseline, open(options.current) as current:
+        regressions = compare(
+            json.load(baseline), json.load(current), options.threshold
+            )
+    if regressions:
+        print('{} benchmarks got slower.'.format(len(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
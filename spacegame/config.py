@@ -4,18 +4,164 @@ from kivy.logger import Logger
 from kivy.resources import resource_add_path
 
 physics = {
+    # The number of times a second combat is simulated. Lower it on slow
+    # hardware, drawing stays smooth either way.
+    'rate': 60,
+
+    # The most steps simulated in a frame. Slower frames drop time instead
+    # of falling further behind.
+    'max_steps': 5,
+
     # A modifier that affects every ship's ability to accelerate.
     'acceleration': 0.25,
 
     # A modifier that affects every ship's ability to turn. Higher is faster.
     'turning': 25,
+
+    # The size of the collision grid cells. About the size of the biggest ship.
+    'cell_size': 100,
+}
+
+
+audio = {
+    # The number of seconds music takes to fade between screens.
+    'crossfade': 1.5,
+
+    # The number of voices loaded for each sound effect. An effect can play
+    # this many times at once.
+    'voices': 4,
+
+    # The most sound effects that can play at once.
+    'max_voices': 12,
+
+    # Effects that cut off lower priority effects when too many are playing.
+    # Effects not listed have a priority of 0.
+    'priorities': {
+        'explosion.ogg': 1,
+        },
+}
+
+
+ai = {
+    # The most milliseconds a step spends steering hostile ships. Ships
+    # over the budget think next step instead. None for no limit.
+    'budget': 1.0,
+
+    # Ships closer to the player than this many pixels think most often.
+    'near': 400,
+
+    # The steps between each time a ship thinks: near the player, elsewhere
+    # in view, and out of view.
+    'intervals': {'near': 1, 'visible': 2, 'hidden': 4},
+
+    # The number of ships steered between checks of the budget.
+    'batch': 64,
+}
+
+
+pools = {
+    # The number of shells built up front for each type of weapon.
+    'shells': 8,
+}
+
+
+levels = {
+    # The most bodies spawned in one step. Bigger waves are spread over
+    # several steps instead of hitching the frame they start in.
+    'spawn_budget': 2,
+}
+
+
+navigation = {
+    # The screens built in the background once every asset has loaded.
+    'prewarm': ['Base', 'Combat'],
+
+    # The screens thrown away when memory runs low. They're built again the
+    # next time they're shown.
+    'releasable': ['Base', 'Combat', 'Return', 'Settings'],
+}
+
+
+preload = {
+    # The number of threads that decode assets while the intro screen shows.
+    'workers': 4,
+}
+
+
+profiling = {
+    # Show the frame timings overlay when combat starts.
+    'overlay': False,
+
+    # The key that shows and hides the overlay during combat.
+    'key': 'f3',
+
+    # The number of recent frames the overlay's percentiles cover.
+    'window': 600,
+
+    # The number of frames kept for exporting, about ten minutes at 60 FPS.
+    'history': 36000,
+
+    # Write the timings to paths['profiles'] when the game closes.
+    'export': False,
+}
+
+
+replays = {
+    # Record every round of combat to paths['replays'] so it can be replayed
+    # with `python3 -m spacegame.simulation.replay`.
+    'record': False,
+}
+
+
+simulation = {
+    # Where combat is stepped: None on the main thread with the drawing,
+    # "thread" on a worker thread, or "process" on a worker process so it
+    # gets a core of its own.
+    'worker': None,
+
+    # The most bodies a worker can hand over to be drawn each step.
+    'capacity': 8192,
+}
+
+
+tracing = {
+    # The key that writes the recent trace events to paths['traces'].
+    'key': 'f4',
+}
+
+
+atlas = {
+    # The name of the atlas files written to paths['atlas'].
+    'name': 'sprites',
+
+    # The width and height of each atlas page in pixels.
+    'size': 1024,
+
+    # The gameplay sprites to pack, as patterns inside paths['images'].
+    'sprites': [
+        'ammo.png',
+        'boom.png',
+        'bullet.png',
+        'capture.png',
+        'exploder*.png',
+        'hostile*.png',
+        'laser.png',
+        'parts.png',
+        'rock_*.png',
+        'ship*.png',
+        ],
 }
 
 
 paths = {
+    'atlas': path.join('assets', 'atlas'),
+    'cache': path.join(path.expanduser('~'), '.cache', 'spacedout'),
     'images': path.join('assets', 'images'),
     'kv': path.join('spacegame', 'kv'),
-    'sounds': path.join('assets', 'sounds')
+    'profiles': 'profiles',
+    'replays': 'replays',
+    'sounds': path.join('assets', 'sounds'),
+    'traces': 'traces',
     }
 
 
@@ -26,6 +172,7 @@ screens = {
             ],
     },
     'Combat': {
+        'killed': 'deadscreen.png',
         'bg': [
             'space1.png',
             'space2.png',
@@ -0,0 +1,39 @@
+"""The first level: a few hostile ships and asteroids, then reinforcements.
+
+A level is a list of waves. Each wave starts `start` seconds into the round
+and spawns its bodies `interval` seconds apart, in order. Spawns name the
+kind of body ("asteroid" or "hostile"), its type in data/objects/obstacles.py
+or data/ships/hostiles.py, how many to spawn and optionally where.
+
+"""
+
+waves = [
+    {
+        'start': 0,
+        'interval': 0.05,
+        'spawns': [
+            {
+                'kind': 'hostile',
+                'type': 'basic',
+                'count': 1,
+                'pos': (500, 500),
+                },
+            {'kind': 'asteroid', 'type': 'lg_asteroid', 'count': 4},
+            ],
+        },
+    {
+        'start': 4,
+        'interval': 0.5,
+        'spawns': [
+            {'kind': 'hostile', 'type': 'basic', 'count': 2},
+            ],
+        },
+    {
+        'start': 10,
+        'interval': 0.5,
+        'spawns': [
+            {'kind': 'hostile', 'type': 'basic', 'count': 2},
+            {'kind': 'asteroid', 'type': 'lg_asteroid', 'count': 2},
+            ],
+        },
+    ]
@@ -0,0 +1,35 @@
+"""The second level: more asteroids and waves of hostile ships."""
+
+waves = [
+    {
+        'start': 0,
+        'interval': 0.05,
+        'spawns': [
+            {
+                'kind': 'hostile',
+                'type': 'basic',
+                'count': 1,
+                'pos': (500, 500),
+                },
+            {'kind': 'hostile', 'type': 'basic', 'count': 1},
+            {'kind': 'asteroid', 'type': 'lg_asteroid', 'count': 6},
+            ],
+        },
+    {
+        'start': 4,
+        'interval': 0.4,
+        'spawns': [
+            {'kind': 'hostile', 'type': 'basic', 'count': 2},
+            {'kind': 'hostile', 'type': 'fast', 'count': 1},
+            ],
+        },
+    {
+        'start': 9,
+        'interval': 0.4,
+        'spawns': [
+            {'kind': 'hostile', 'type': 'tank', 'count': 1},
+            {'kind': 'hostile', 'type': 'basic', 'count': 2},
+            {'kind': 'asteroid', 'type': 'lg_asteroid', 'count': 3},
+            ],
+        },
+    ]
@@ -0,0 +1,25 @@
+"""The third level: more hostiles and asteroids keep coming."""
+
+waves = [
+    {
+        'start': 0,
+        'interval': 0.05,
+        'spawns': [
+            {
+                'kind': 'hostile',
+                'type': 'basic',
+                'count': 1,
+                'pos': (500, 500),
+                },
+            {'kind': 'asteroid', 'type': 'lg_asteroid', 'count': 6},
+            ],
+        },
+    {
+        'start': 5,
+        'interval': 0.5,
+        'spawns': [
+            {'kind': 'asteroid', 'type': 'lg_asteroid', 'count': 3},
+            {'kind': 'hostile', 'type': 'fast', 'count': 2},
+            ],
+        },
+    ]
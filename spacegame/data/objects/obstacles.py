@@ -2,6 +2,7 @@
 
 lg_asteroid = {
     'skin': 'rock_stone_lg.png',
+    'radius': 31,
     'states': {
         'exploded': {
             'skin': 'boom.png',
@@ -12,6 +13,7 @@ lg_asteroid = {
 
 med_asteroid = {
     'skin': 'rock_stone_md.png',
+    'radius': 29,
     'states': {
         'exploded': {
             'skin': 'boom.png',
@@ -22,6 +24,7 @@ med_asteroid = {
 
 sm_asteroid = {
     'skin': 'rock_stone_sm.png',
+    'radius': 27,
     'states': {
         'exploded': {
             'skin': 'boom.png',
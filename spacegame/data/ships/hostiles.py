@@ -2,6 +2,7 @@
 
 fast = {
     'skin': 'hostile1.png',
+    'radius': 36,
     'states': {
         'exploded': {
             'skin': 'boom.png',
@@ -19,6 +20,7 @@ fast = {
 
 basic = {
     'skin': 'hostile2.png',
+    'radius': 26,
     'states': {
         'exploded': {
             'skin': 'boom.png',
@@ -36,6 +38,7 @@ basic = {
 
 tank = {
     'skin': 'hostile3.png',
+    'radius': 33,
     'states': {
         'exploded': {
             'skin': 'boom.png',
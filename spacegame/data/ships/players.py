@@ -2,6 +2,7 @@
 
 fast = {
     'skin': 'ship1.png',
+    'radius': 32,
     'states': {
         'exploded': {
             'skin': 'boom.png',
@@ -19,6 +20,7 @@ fast = {
 
 basic = {
     'skin': 'ship2.png',
+    'radius': 35,
     'states': {
         'exploded': {
             'skin': 'boom.png',
@@ -36,6 +38,7 @@ basic = {
 
 tank = {
     'skin': 'ship3.png',
+    'radius': 34,
     'states': {
         'exploded': {
             'skin': 'boom.png',
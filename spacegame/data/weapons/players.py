@@ -3,6 +3,7 @@
 lasers = {
     'sfx': 'pew.ogg',
     'skin': 'laser.png',
+    'radius': 8,
     'stats': {
         'recharge': 0.5,
         'speed': 20,
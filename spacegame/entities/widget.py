@@ -1,16 +1,23 @@
 """Widgets are spacegame entities that start from Kivy widgets."""
 
-from kivy.logger import Logger
 from kivy.properties import NumericProperty, StringProperty
-from kivy.vector import Vector
 import kivy.uix.widget
 
+from spacegame import atlas
+from spacegame.archetypes import lookup
+from spacegame import tracing
+from spacegame.tracing import DEBUG
+
+LOADING = tracing.event('Entities', 'Loading "{}" entity type.')
+SKIN = tracing.event('Entities', 'Object Skin: {}.')
+
 
 class Widget(kivy.uix.widget.Widget):
     """The base object loads common properties from a dataset in data/objects.
 
     Game entities are loaded from data modules. The widget's dataset cannot
-    change, but the type can.
+    change, but the type can. Widgets only show entities; they are moved by
+    the bodies in `spacegame.simulation`.
 
     Args:
         type (str): The type of ship to instantiate.
@@ -18,8 +25,9 @@ class Widget(kivy.uix.widget.Widget):
 
     Attributes:
         angle (int): The rotation angle of the ship in degrees.
+        archetype (Archetype): The data the widget's type was loaded from.
         skin (str): The ship's image without the path (images go in
-            assets/images).
+            assets/images), or its region of the sprite atlas.
         speed (float): The current speed of the ship in made up units.
 
     """
@@ -34,36 +42,25 @@ class Widget(kivy.uix.widget.Widget):
         self.dataset = dataset
         self.load(type)
 
-    def datum(self, key, default=None):
-        """Retrieve an attribute from the dataset according to type."""
-        return getattr(self.dataset, self.type).get(key, default)
-
     def load(self, type):
         """Change the widget's type to another type in the dataset.
 
-        If the type is the same as before, the attributes are copied from the
-        dataset again.
+        If the type is the same as before, the attributes are loaded from its
+        archetype again.
 
         Args:
             type (str): The key in the data file to load from.
 
         """
-        Logger.debug('Entities: Loading "{}" entity type.'.format(type))
+        if DEBUG:
+            tracing.trace(LOADING, type)
 
         self.type = type
-        self.skin = self.datum('skin')
-        self.states = self.datum('states')
-        self.speed = self.datum('speed', default=0)
-        self.angle = self.datum('angle', default=0)
-
-        Logger.debug('Entities: Object Skin: {}.'.format(self.skin))
-
-    def move(self, windowsize=(None, None)):
-        """Advance the entity position according to its velocity."""
-        delta = Vector(self.speed, 0).rotate(self.angle)
-        self.pos = delta + self.pos
-        for i in [0, 1]:  # Wrap the screen.
-            if self.pos[i] < -5:
-                self.pos[i] = windowsize[i]
-            elif self.pos[i] > windowsize[i]:
-                self.pos[i] = 0
+        self.archetype = archetype = lookup(self.dataset, type)
+        self.skin = atlas.resolve(archetype.skin)
+        self.states = archetype.states
+        self.speed = archetype.speed
+        self.angle = archetype.angle
+
+        if DEBUG:
+            tracing.trace(SKIN, self.skin)
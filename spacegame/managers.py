@@ -1,8 +1,18 @@
 """Manage various aspects of the game."""
+from concurrent.futures import ThreadPoolExecutor
+from kivy.clock import Clock
 from kivy.core.audio import SoundLoader
 from kivy.logger import Logger
 from math import sqrt
 from os.path import basename
+from random import choice
+from time import monotonic
+
+from spacegame import tracing
+from spacegame.config import audio, screens
+from spacegame.tracing import DEBUG
+
+VOLUME = tracing.event('Sounds', 'The volume set of {} is {}.')
 
 
 class Resource:
@@ -21,17 +31,73 @@ class Resource:
         self.subscribers = {}
 
 
+class Voices(Resource):
+    """A sound effect loaded several times so it can overlap itself.
+
+    Args:
+        tracks (list of kivy.core.audio.Sound): The same sound loaded once
+            per voice. Empty if the sound couldn't be loaded, in which case
+            it never plays.
+        priority (int): Effects with a higher priority take voices from
+            effects with a lower one when too many are playing.
+
+    Attributes:
+        started (list): When each voice last started playing.
+        tracks (list of kivy.core.audio.Sound): The voices.
+
+    """
+
+    def __init__(self, tracks, priority=0):
+        super().__init__(tracks[0] if tracks else None)
+        self.tracks = tracks
+        self.priority = priority
+        self.started = [0.0] * len(tracks)
+
+    def playing(self):
+        """Return the indexes of the voices that are playing."""
+        return [
+            index for index, track in enumerate(self.tracks)
+            if track.state == 'play'
+            ]
+
+    def voice(self):
+        """Return the index of a free voice, or the oldest if none are."""
+        for index, track in enumerate(self.tracks):
+            if track.state != 'play':
+                return index
+        return min(range(len(self.tracks)), key=self.started.__getitem__)
+
+    def play(self, index):
+        """Start a voice from the beginning, cutting it off if it's playing."""
+        track = self.tracks[index]
+        if track.state == 'play':
+            track.stop()
+        track.play()
+        self.started[index] = monotonic()
+
+
 class SoundManager:
     """Provide access to sound resources and play them at the right volume.
 
+    Each sound effect is loaded as several voices so it can overlap itself,
+    e.g. during rapid fire. When every voice of an effect is busy its oldest
+    voice is restarted. When `max_voices` effects are already playing, the
+    oldest effect with the lowest priority is cut off, unless every effect
+    playing has a higher priority than the new one.
+
     Attributes:
-        sfx (dict of Resources): Sound effects resources.
-        music (dict): Music tracks.
+        max_voices (int): The most sound effects that can play at once.
+        priorities (dict): The priority of each sound effect. Effects not
+            listed have a priority of 0.
+        sfx (dict of Voices): Sound effects resources.
+        voices (int): The number of voices loaded for each sound effect.
         volumes (dict): The various volume levels: sfx, music, and master.
 
     """
+    max_voices = audio['max_voices']
+    priorities = audio['priorities']
     sfx = {}
-    music = {}
+    voices = audio['voices']
     volumes = {
         'sfx': 1.0,
         'music': 0.25,
@@ -50,13 +116,56 @@ class SoundManager:
         fn = basename(source)
         try:  # Subscribe the subscriber to the sfx resource.
             resource = cls.sfx[fn]
-        except KeyError:  # Create the sfx resource and subscribe.
-            track = SoundLoader.load(fn)
-            track.volume = cls.sfx_volume()
-            resource = Resource(track)
-            cls.sfx[fn] = resource
+        except KeyError:  # Load the sfx voices and subscribe.
+            resource = cls.add_voices(fn, cls.load_voices(fn))
         resource.subscribers[subscriber] = subscriber
 
+    @classmethod
+    def load_voices(cls, source):
+        """Load a sound effect once for each voice.
+
+        This only reads files, so it can run on a worker thread.
+
+        Returns:
+            list: The voices that loaded. It's empty when no audio provider
+            can load the sound.
+
+        """
+        fn = basename(source)
+        tracks = [SoundLoader.load(fn) for i in range(cls.voices)]
+        loaded = [track for track in tracks if track is not None]
+        if len(loaded) < len(tracks):
+            Logger.warning(
+                'Audio: Could not load "{}", it will be silent.'.format(fn)
+                )
+        return loaded
+
+    @classmethod
+    def add_voices(cls, source, tracks):
+        """Add the voices of a sound effect that has been loaded.
+
+        Args:
+            source (str): The name of the sound.
+            tracks (list): The voices returned by `load_voices()`.
+
+        Returns:
+            Voices: The sfx resource. If the sound had already been added,
+            the new voices are unloaded and the existing resource returned.
+
+        """
+        fn = basename(source)
+        tracks = [track for track in tracks if track is not None]
+        if fn in cls.sfx:
+            for track in tracks:
+                track.unload()
+            return cls.sfx[fn]
+
+        for track in tracks:
+            track.volume = cls.sfx_volume()
+        resource = Voices(tracks, cls.priorities.get(fn, 0))
+        cls.sfx[fn] = resource
+        return resource
+
     @classmethod
     def remove_sfx(cls, source, subscriber):
         """Unsubscribe from an SFX track.
@@ -73,24 +182,62 @@ class SoundManager:
         del resource.subscribers[subscriber]
         if len(resource.subscribers) == 0:
             del cls.sfx[fn]
-            resource.track.unload()
+            for track in resource.tracks:
+                track.unload()
 
     @classmethod
     def play_sfx(cls, source):
-        """Play one of the sfx tracks.
+        """Play one of the sfx tracks on a free voice.
 
         Args:
             source (str): The filename or path to play.
 
+        Returns:
+            bool: False if the sound was dropped because too many sounds
+            with a higher priority are playing, or couldn't be loaded.
+
         """
         resource = cls.sfx[basename(source)]
-        resource.track.play()
+        if not resource.tracks:  # It couldn't be loaded.
+            return False
+        index = resource.voice()
+        if resource.tracks[index].state != 'play':
+            playing = sum(len(voices.playing()) for voices in cls.sfx.values())
+            if playing >= cls.max_voices and not cls.steal(resource.priority):
+                return False
+        resource.play(index)
+        return True
+
+    @classmethod
+    def steal(cls, priority):
+        """Stop the oldest lowest priority voice to make room for another.
+
+        Args:
+            priority (int): The priority of the sound that needs a voice.
+
+        Returns:
+            bool: True if a voice was stopped.
+
+        """
+        candidates = [
+            (voices.priority, voices.started[index], voices.tracks[index])
+            for voices in cls.sfx.values()
+            for index in voices.playing()
+            ]
+        if not candidates:
+            return True
+        lowest, started, track = min(candidates, key=lambda c: c[:2])
+        if lowest > priority:
+            return False
+        track.stop()
+        return True
 
     @classmethod
     def update_sfx(cls):
         """Apply the current sfx volume levels to all the sfx tracks."""
-        for resource in cls.sfx:
-            resource.track.volume = cls.sfx_volume()
+        for resource in cls.sfx.values():
+            for track in resource.tracks:
+                track.volume = cls.sfx_volume()
 
     @classmethod
     def sfx_volume(cls, volume=None):
@@ -108,58 +255,10 @@ class SoundManager:
 
         return cls.scale(cls.volumes['sfx'], cls.master_volume())
 
-    @classmethod
-    def add_music(cls, source, subscriber):
-        """Add a music track.
-
-        Args:
-            source (str): The name of the music to add.
-            subscriber (obj): The object using the track.
-
-        """
-        fn = basename(source)
-        try:  # Subscribe the subscriber to the music resource.
-            resource = cls.music[fn]
-        except KeyError:  # Create the music resource and subscribe.
-            track = SoundLoader.load(fn)
-            track.volume = cls.music_volume()
-            resource = Resource(track)
-            cls.music[fn] = resource
-        resource.subscribers[subscriber] = subscriber
-
-    @classmethod
-    def remove_music(cls, source, subscriber):
-        """Remove one of the music tracks or its subscriber.
-
-        Args:
-            source (str): The filename of the track to remove.
-            subscriber (obj): The object no longer using the track.
-
-        """
-        fn = basename(source)
-        resource = cls.music[fn]
-        del resource.subscribers[subscriber]
-        if len(resource.subscribers) == 0:
-            del cls.music[fn]
-            resource.track.unload()
-
-    @classmethod
-    def play_music(cls, source, loop=True):
-        """Play one of the music tracks.
-
-        Args:
-            source (str): The filename or path to play.
-
-        """
-        resource = cls.music[basename(source)]
-        resource.track.loop = loop
-        resource.track.play()
-
     @classmethod
     def update_music(cls):
         """Apply the current music volume levels to all the music tracks."""
-        for track in cls.music:
-            track.volume = cls.music_volume()
+        MusicManager.update()
 
     @classmethod
     def music_volume(cls, volume=None):
@@ -215,5 +314,208 @@ class SoundManager:
             product *= volume
 
         scaled = sqrt(len(volumes)*product) / sqrt(len(volumes))
-        Logger.debug("The volume set of {} is {}.".format(volumes, scaled))
+        if DEBUG:
+            tracing.trace(VOLUME, volumes, scaled)
         return scaled
+
+
+class Track:
+    """A music track being loaded on the worker thread or ready to play.
+
+    Args:
+        source (str): The filename of the track.
+        future (concurrent.futures.Future): Loads the track's sound.
+
+    Attributes:
+        level (float): How far the track has faded in, from 0 to 1.
+        sound (kivy.core.audio.Sound): The track once it has loaded.
+        started (bool): True once the track has played.
+        target (float): The level the track is fading towards.
+
+    """
+
+    def __init__(self, source, future):
+        self.source = source
+        self.future = future
+        self.sound = None
+        self.level = 0.0
+        self.target = 0.0
+        self.started = False
+
+    def start(self):
+        """Play the track from the start if it's loaded and not playing."""
+        if self.sound is not None and self.sound.state != 'play':
+            self.sound.volume = 0
+            self.sound.loop = True
+            self.sound.play()
+            self.started = True
+
+
+class MusicManager:
+    """Stream in music on a worker thread and crossfade between tracks.
+
+    Loading a track decodes the whole file, so tracks are loaded on a worker
+    thread and the next screen's track can be prefetched before it's needed.
+    Playing a playlist fades its track in and every other track out. Tracks
+    that have faded out are unloaded once the fade ends, and tracks that
+    were prefetched for other playlists are unloaded straight away.
+
+    Attributes:
+        executor (ThreadPoolExecutor): The worker that loads the tracks.
+        fade_time (float): The number of seconds a crossfade takes.
+        fader (ClockEvent): Steps the fades while any are running.
+        tracks (dict of Track): The tracks loading, loaded or playing.
+        upcoming (dict): The track prefetched for each playlist.
+
+    """
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    fade_time = audio['crossfade']
+    fader = None
+    tracks = {}
+    upcoming = {}
+
+    @classmethod
+    def load(cls, source):
+        """Start loading a track unless it's already loaded or loading."""
+        fn = basename(source)
+        try:
+            return cls.tracks[fn]
+        except KeyError:
+            track = Track(fn, cls.executor.submit(SoundLoader.load, fn))
+            cls.tracks[fn] = track
+            track.future.add_done_callback(
+                lambda future: Clock.schedule_once(
+                    lambda dt: cls.loaded(track)
+                    )
+                )
+            return track
+
+    @classmethod
+    def loaded(cls, track):
+        """Start a track that has finished loading if it's wanted."""
+        sound = track.future.result()
+        if sound is None:
+            Logger.error('Music: Failed to load "{}".'.format(track.source))
+            if cls.tracks.get(track.source) is track:
+                del cls.tracks[track.source]
+            return
+
+        track.sound = sound
+        if cls.tracks.get(track.source) is not track:
+            sound.unload()  # It was released while loading.
+        elif track.target > 0:
+            track.start()
+            cls.fade()
+
+    @classmethod
+    def prefetch(cls, playlist):
+        """Choose the next track for a screen and load it in the background.
+
+        Args:
+            playlist (str): The screen in `config.screens` to choose from.
+
+        Returns:
+            str: The filename of the track.
+
+        """
+        try:
+            source = cls.upcoming[playlist]
+        except KeyError:
+            source = choice(screens[playlist]['music'])
+            cls.upcoming[playlist] = source
+        cls.load(source)
+        return source
+
+    @classmethod
+    def play(cls, playlist):
+        """Fade in a screen's music and fade out everything else.
+
+        A track from the playlist that's still playing or fading out keeps
+        playing instead of starting over. Otherwise the prefetched track is
+        played, as soon as it has loaded. Tracks prefetched for other
+        playlists are unloaded.
+
+        Args:
+            playlist (str): The screen in `config.screens` to play.
+
+        Returns:
+            str: The filename of the track.
+
+        """
+        sources = screens[playlist]['music']
+        for track in cls.tracks.values():
+            if track.source in sources and (track.level or track.target):
+                source = track.source
+                break
+        else:
+            source = cls.prefetch(playlist)
+        cls.upcoming.clear()
+
+        for track in list(cls.tracks.values()):
+            if not track.started and track.source != source:
+                cls.release(track)  # Prefetched but not played.
+            else:
+                track.target = 0.0
+        track = cls.load(source)
+        track.target = 1.0
+        track.start()
+        cls.fade()
+        return source
+
+    @classmethod
+    def release(cls, track):
+        """Unload a track, or once it has loaded if it's still loading."""
+        del cls.tracks[track.source]
+        if track.sound is not None:
+            track.sound.unload()
+
+    @classmethod
+    def stop(cls, source):
+        """Fade out a track and unload it once it's silent."""
+        try:
+            cls.tracks[basename(source)].target = 0.0
+        except KeyError:
+            return
+        cls.fade()
+
+    @classmethod
+    def fade(cls):
+        """Step the fades every frame until they're all finished."""
+        if cls.fader is None:
+            cls.fader = Clock.schedule_interval(cls.step, 0)
+
+    @classmethod
+    def step(cls, dt):
+        """Move every track's volume towards its target."""
+        change = dt / cls.fade_time if cls.fade_time else 1.0
+        volume = SoundManager.music_volume()
+        fading = False
+        for track in list(cls.tracks.values()):
+            if track.sound is None:
+                continue
+            if track.level < track.target:
+                track.level = min(track.target, track.level + change)
+            elif track.level > track.target:
+                track.level = max(track.target, track.level - change)
+            track.sound.volume = track.level * volume
+
+            if track.level != track.target:
+                fading = True
+            elif track.started and track.level == 0:
+                track.sound.stop()
+                track.sound.unload()
+                del cls.tracks[track.source]
+
+        if not fading:
+            cls.fader.cancel()
+            cls.fader = None
+            return False
+
+    @classmethod
+    def update(cls):
+        """Apply the current music volume to every track."""
+        volume = SoundManager.music_volume()
+        for track in cls.tracks.values():
+            if track.sound is not None:
+                track.sound.volume = track.level * volume
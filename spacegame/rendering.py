@@ -0,0 +1,178 @@
+"""Draw every body in a world with a handful of meshes.
+
+Giving each body its own widget costs a PushMatrix, Rotate, Ellipse and
+PopMatrix per body per frame. The renderer instead groups the bodies by
+texture and draws each group as one `Mesh` of rotated quads. The quads are
+computed for every body at once from the rows of an `EntityStore`, so the
+number of draw calls depends on the number of textures in use, not on the
+number of bodies on screen.
+
+"""
+import numpy as np
+from kivy.core.image import Image as CoreImage
+from kivy.graphics import Color, Mesh
+from kivy.uix.widget import Widget
+
+from spacegame import atlas
+from spacegame.simulation.store import EntityStore
+
+# The corners of a quad around its centre, counter-clockwise from the bottom
+# left, matching the order of a texture's `tex_coords`.
+CORNERS = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float64)
+
+# A mesh's indices are unsigned shorts, so a mesh holds at most this many.
+MAX_QUADS = 65536 // 4
+
+# The triangle indices built so far. Every batch draws a prefix of them.
+indices = []
+
+
+def quad_indices(count):
+    """Return the triangle indices that draw `count` quads."""
+    for quad in range(len(indices) // 6, count):
+        i = 4 * quad
+        indices.extend((i, i + 1, i + 2, i + 2, i + 3, i))
+    return indices[:6 * count]
+
+
+class Batch:
+    """A mesh that draws every body whose skin is on one texture.
+
+    Args:
+        texture (kivy.graphics.texture.Texture): The texture to draw with.
+
+    Attributes:
+        count (int): The number of quads drawn last frame.
+        mesh (kivy.graphics.Mesh): The mesh drawing the quads.
+
+    """
+
+    def __init__(self, texture):
+        self.texture = texture
+        self.mesh = Mesh(texture=texture, mode='triangles')
+        self.count = 0
+
+    def update(self, vertices):
+        """Replace the quads the mesh draws.
+
+        Args:
+            vertices (numpy.ndarray): A quad per row, each made of four
+                x, y, u, v vertices.
+
+        """
+        count = min(len(vertices), MAX_QUADS)
+        self.mesh.vertices = vertices[:count].ravel().tolist()
+        if count != self.count:
+            self.mesh.indices = quad_indices(count)
+            self.count = count
+
+
+class CombatRenderer(Widget):
+    """A widget that draws the bodies in an `EntityStore`.
+
+    Call `draw()` once a frame after the world has been stepped. Bodies are
+    drawn between their previous and current states so movement stays smooth
+    when the world is stepped less often than frames are drawn.
+
+    Attributes:
+        batches (list): A batch for each texture, in the order first seen.
+        batch_ids (dict): The index in `batches` for each texture's id.
+
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.batch_ids = {}
+
+        # What every sprite in `EntityStore.sprites` looks like.
+        self.sprite_batch = np.zeros(0, dtype=np.intp)
+        self.sprite_half = np.zeros((0, 2), dtype=np.float64)
+        self.sprite_angle = np.zeros(0, dtype=np.float64)
+        self.sprite_uvs = np.zeros((0, 4, 2), dtype=np.float64)
+
+        with self.canvas:
+            Color(1, 1, 1, 1)
+
+    @property
+    def draw_calls(self):
+        """int: The number of meshes drawn last frame."""
+        return sum(1 for batch in self.batches if batch.count)
+
+    def texture(self, skin):
+        """Load the texture for a skin, from the sprite atlas if it's there.
+
+        Skins in the same atlas share a texture, so they share a batch.
+
+        """
+        return CoreImage(atlas.resolve(skin)).texture
+
+    def load_sprites(self):
+        """Look up the textures of the sprites added since the last frame."""
+        sprites = EntityStore.sprites
+        known = len(self.sprite_angle)
+        if known == len(sprites):
+            return
+
+        batches, half, angles, uvs = [], [], [], []
+        for skin, width, height, angle in sprites[known:]:
+            texture = self.texture(skin)
+            try:
+                batch = self.batch_ids[texture.id]
+            except KeyError:
+                batch = len(self.batches)
+                self.batch_ids[texture.id] = batch
+                self.batches.append(Batch(texture))
+                self.canvas.add(self.batches[batch].mesh)
+            batches.append(batch)
+            half.append((width / 2, height / 2))
+            angles.append(angle)
+            uvs.append(np.reshape(texture.tex_coords, (4, 2)))
+
+        self.sprite_batch = np.concatenate((self.sprite_batch, batches))
+        self.sprite_half = np.concatenate((self.sprite_half, half))
+        self.sprite_angle = np.concatenate((self.sprite_angle, angles))
+        self.sprite_uvs = np.concatenate((self.sprite_uvs, uvs))
+
+    def draw(self, store, alpha=1.0):
+        """Rebuild every batch from the bodies in a store.
+
+        Each sprite is drawn centred on its body's hit box and rotated to
+        the body's heading.
+
+        Args:
+            store (EntityStore): The bodies to draw.
+            alpha (float): How far to draw bodies from their previous state
+                to their current state, from 0 to 1.
+
+        """
+        self.load_sprites()
+
+        n = store.count
+        rows = np.flatnonzero(~store.offscreen[:n])
+        sprite = store.sprite[rows]
+
+        # Draw each body part of the way from its last state to this one.
+        prev_x, prev_y = store.prev_x[rows], store.prev_y[rows]
+        x = prev_x + (store.x[rows] - prev_x) * alpha
+        y = prev_y + (store.y[rows] - prev_y) * alpha
+        prev_angle = store.prev_angle[rows]
+        angle = prev_angle + (store.angle[rows] - prev_angle) * alpha
+
+        # Rotate the corners of every quad around the centre of its body.
+        angle = np.radians(angle + self.sprite_angle[sprite])
+        cos = np.cos(angle)[:, None]
+        sin = np.sin(angle)[:, None]
+        corners = CORNERS[None, :, :] * self.sprite_half[sprite][:, None, :]
+        dx, dy = corners[..., 0], corners[..., 1]
+        cx = (x + store.width[rows] / 2)[:, None]
+        cy = (y + store.height[rows] / 2)[:, None]
+
+        vertices = np.empty((len(rows), 4, 4), dtype=np.float64)
+        vertices[..., 0] = cx + dx * cos - dy * sin
+        vertices[..., 1] = cy + dx * sin + dy * cos
+        vertices[..., 2:] = self.sprite_uvs[sprite]
+
+        batch_of = self.sprite_batch[sprite]
+        for index, batch in enumerate(self.batches):
+            batch.update(vertices[batch_of == index])
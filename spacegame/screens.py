@@ -1,28 +1,45 @@
 """Controllers for the various game screens."""
-from functools import partial
-from random import choice, randint
+from datetime import datetime
+from os import makedirs, path
+from random import randrange
 
+from kivy.app import App
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.logger import Logger
-from kivy.properties import (
-    ListProperty,
-    NumericProperty,
-    ObjectProperty,
-    StringProperty,
-    )
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.image import Image
 from kivy.uix.label import CoreLabel
 from kivy.uix.popup import Popup
-from kivy.uix.screenmanager import Screen
+from kivy.factory import Factory
+from kivy.properties import DictProperty, ListProperty, StringProperty
+from kivy.uix.screenmanager import Screen, ScreenManager
 
-from spacegame.entities.obstacles import AsteroidObstacle
+from spacegame import assets
+from spacegame import tracing
+from spacegame.backgrounds import Background  # Used by the kv files.
 from spacegame.entities.ships import PlayerShip
+from spacegame.config import ai
+from spacegame.config import paths
+from spacegame.config import levels
 from spacegame.config import physics
+from spacegame.config import pools
+from spacegame.config import profiling
+from spacegame.config import replays
 from spacegame.config import screens
-from spacegame.managers import SoundManager
+from spacegame.config import simulation
+from spacegame.managers import MusicManager, SoundManager
+from spacegame.rendering import CombatRenderer  # Used by combatscreen.kv.
+from spacegame.simulation.profiling import Profiler
+from spacegame.simulation.replay import Recorder, build_world
+from spacegame.simulation.timestep import FixedTimestep
+from spacegame.simulation.worker import SimulationWorker, sounds
+from spacegame.tracing import DEBUG, INFO
+
+KEY_DOWN = tracing.event('KeyDown Event', 'Keycode[1] is "{}"')
+KEY_UP = tracing.event('KeyUp Event', 'Keycode[1] is "{}"')
+EXPLODED = tracing.event('Explode', '"{}" has collided.', tracing.INFO_LEVEL)
 
 
 class IntroScreen(Screen):
@@ -38,25 +55,31 @@ class IntroScreen(Screen):
         """Perform tasks to ready the scene right before it is switched to."""
         Logger.info('Application: Changed to the Intro screen.')
         self.start_soundtrack()
+        preloader = App.get_running_app().preloader
+        preloader.bind(progress=self.show_progress)
+        self.show_progress(preloader, preloader.progress)
+
+    def show_progress(self, preloader, progress):
+        """Show how much of the game has loaded."""
+        if preloader.done:
+            self.ids.result.text = ''
+        else:
+            self.ids.result.text = 'Loading {:.0%}'.format(progress)
 
     def on_pre_leave(self):
         """Clean up the scene."""
         Logger.info('Application: Leaving the Intro screen.')
+        App.get_running_app().preloader.unbind(progress=self.show_progress)
 
     def start_soundtrack(self):
-        """Choose and play music for the intro scene."""
-        sources = screens['Intro']['music']
-        self.source = choice(sources)
+        """Fade in music for the intro scene."""
+        self.source = MusicManager.play('Intro')
         Logger.info('Chose "{}" as the intro music.'.format(self.source))
-        try:
-            SoundManager.music[self.source]
-        except KeyError:
-            SoundManager.add_music(self.source, self)
-            SoundManager.play_music(self.source)
+        MusicManager.prefetch('Combat')
 
     def stop_soundtrack(self):
-        """Stop the intro scene music."""
-        SoundManager.remove_music(self.source, self)
+        """Fade out the intro scene music."""
+        MusicManager.stop(self.source)
 
 
 class BaseScreen(Screen):
@@ -92,7 +115,7 @@ class BaseScreen(Screen):
 
     def on_pre_leave(self):
         """Clean up the scene."""
-        Logger.info('Application: Leaving the Intro screen.')
+        Logger.info('Application: Leaving the Base screen.')
 
     def select_ship(self, type):
         """Change the stats of the ship on the base page.
@@ -102,10 +125,10 @@ class BaseScreen(Screen):
 
         """
         ship = PlayerShip(type=type)
-        self.speed = str(ship.stats['speed'])
-        self.hp = str(ship.stats['hp'])
-        self.attack = str(ship.stats['attack'])
-        self.ammo = str(ship.stats['ammo'])
+        self.speed = str(ship.stats.speed)
+        self.hp = str(ship.stats.hp)
+        self.attack = str(ship.stats.attack)
+        self.ammo = str(ship.stats.ammo)
         self.skin = ship.skin
         self.ship = ship
         Logger.info(
@@ -116,34 +139,60 @@ class BaseScreen(Screen):
 
 
 class CombatScreen(Screen):
-    """The screen that the user flies around shooting enemies."""
+    """The screen that the user flies around shooting enemies.
+
+    The combat itself is simulated by a `World`. The screen steps the world
+    at a fixed rate, draws its bodies with a `CombatRenderer` every frame and
+    plays the sounds for its events. When `simulation['worker']` is set, a
+    `SimulationWorker` steps the world instead and the screen draws the
+    latest snapshot it published.
+
+    Press `profiling['key']` during combat to show how long each phase of
+    a frame takes.
+
+    Attributes:
+        profiler (Profiler): Times the phases of every frame. It's shared
+            so the timings outlive the screen.
+        profile_updater (ClockEvent): Refreshes the timings overlay.
+        recorder (Recorder): Records the round when `replays['record']` is
+            set, or None.
+        shiptype (str): The type of player ship to launch with.
+        sounds (dict): The sound effects each body, by handle, and the
+            screen itself have subscribed to.
+        steps (int): The number of steps the worker had taken by the last
+            snapshot drawn.
+        timestep (FixedTimestep): Turns frame times into world steps.
+        worker (SimulationWorker): Steps the world when it's simulated off
+            the main thread, otherwise None.
+        world (World): The simulated round of combat, or None when a worker
+            simulates it.
 
-    player = ObjectProperty(None)
-    hostile = ObjectProperty(None)
-    shiptype = StringProperty(None)
-    updater = None
-    #lives = NumericProperty(None)
-    new_round = True
-    objects = []
-    shells = []
-    asteroids = ListProperty()
-    explosions = ListProperty()
-    hostile_odd_move = True
-    random_select_action = None
+    """
 
+    profiler = Profiler(profiling['window'], profiling['history'])
+    profile_updater = None
+    recorder = None
+    shiptype = StringProperty('basic')
+    steps = 0
+    timestep = None
+    updater = None
+    worker = None
+    world = None
 
     def __init__(self, **kwargs):
+        # The kv rule draws the score label, so make it before it's applied.
+        self.score = 0
+        self.score_label = CoreLabel(text=str("Score: " + str(self.score)))
+        self.score_label.refresh()
+
         super().__init__(**kwargs)
 
         self.keyboard = Window.request_keyboard(self.on_keyboard_closed, self)
         self.keyboard.bind(on_key_down=self.on_key_down)
         self.keyboard.bind(on_key_up=self.on_key_up)
 
-        self.score = 0
-        self.score_label = CoreLabel(text=str("Score: " + str(self.score)))
-        self.score_label.refresh()
-
         self.level = 1
+        self.sounds = {}
 
         # Create a set of pressed keys for the given moment
         self.keysPressed = set()
@@ -154,32 +203,67 @@ class CombatScreen(Screen):
         Logger.info(
             'Application: '
             'The ship chosen for combat is the '
-            '"{}" type.'.format(self.player.type)
+            '"{}" type.'.format(self.shiptype)
             )
-        Logger.info('Application: Stats: {}.'.format(self.player.stats))
         self.start_soundtrack()
 
-        # Set the event interval of every frame
-        self.updater = Clock.schedule_interval(self.update, 1.0/60.0)
-
-        # Populate round/level objects and collidable lists
-        self.collidables = []
-        self.spaceships = []
-
-        # Sets the combat stage/hostiles based on players level
-        self.set_level_hostiles()
-
-
-        for asteroid in self.asteroids:
-            self.collidables.append(asteroid)
-        for ship in self.spaceships:
-            self.collidables.append(ship)
+        # Everything needed to play the round again from a recording.
+        settings = {
+            'seed': randrange(2**32),
+            'rate': physics['rate'],
+            'physics': physics,
+            'difficulty': App.get_running_app().difficulty,
+            'pool_size': pools['shells'],
+            'ai': ai,
+            'shiptype': self.shiptype,
+            'level': self.level,
+            'spawn_budget': levels['spawn_budget'],
+            }
+        mode = simulation['worker']
+        if mode is not None:
+            record = self.recording_name() if replays['record'] else None
+            self.worker = SimulationWorker(
+                settings, Window.size, mode, simulation['capacity'], record
+                )
+            self.worker.start()
+            self.steps = 0
+            Logger.info(
+                'Application: Simulating combat on a worker {}.'.format(mode)
+                )
+            self.updater = Clock.schedule_interval(self.follow, 0)
+            self.show_profile(profiling['overlay'])
+            return
+
+        # The level's waves spawn over the first frames of the round.
+        self.world = build_world(settings, Window.size, self.profiler)
+        self.timestep = FixedTimestep(physics['rate'], physics['max_steps'])
+        self.recorder = Recorder(**settings) if replays['record'] else None
+        Logger.info('Application: Stats: {}.'.format(self.world.player.stats))
+        self.add_sounds()
+        self.ids.renderer.draw(self.world.store)
+
+        # Draw every frame, the timestep decides when the world steps.
+        self.updater = Clock.schedule_interval(self.update, 0)
+        self.show_profile(profiling['overlay'])
 
     def on_pre_leave(self):
         """Perform clean up right before the scene is switched from."""
         Logger.info('Application: Leaving the Combat screen.')
         self.updater.cancel()  # Clear the event interval.
+        self.show_profile(False)
         self.stop_soundtrack()
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+        for handle in list(self.sounds):
+            self.remove_sounds(handle)
+        if self.recorder is not None:
+            self.save_recording()
+
+    def unload(self):
+        """Give the keyboard back before the screen is thrown away."""
+        if self.keyboard is not None:
+            self.keyboard.release()
 
     def on_keyboard_closed(self):
         """Act on the keyboard closing."""
@@ -189,236 +273,161 @@ class CombatScreen(Screen):
 
     def on_key_down(self, keyboard, keycode, text, modifiers):
         """Act on a key being pressed down."""
-        Logger.debug('KeyDown Event: Keycode[1] is "{}"'.format(keycode[1]))
+        if DEBUG:
+            tracing.trace(KEY_DOWN, keycode[1])
+        if keycode[1] == profiling['key']:
+            self.show_profile(self.profile_updater is None)
         self.keysPressed.add(keycode[1])
 
     def on_key_up(self, keyboard, keycode):
         """Act on a key being released up."""
-        Logger.debug('KeyUp Event: Keycode[1] is "{}"'.format(keycode[1]))
-        self.keysPressed.remove(keycode[1])
-
-    def set_level_hostiles(self):
-        if self.level == 1:
-            self.init_players()
-            self.init_hostiles(4)
-            for i in range(4):
-                self.generate_asteroid()
-        elif self.level == 2:
-            self.init_players()
-            self.init_hostiles(4)
-            for i in range(6):
-                self.generate_asteroid()
-        elif self.level == 3:
-            self.init_players()
-            self.init_hostiles(4)
-            for i in range(9):
-                self.generate_asteroid()
-
-
-    def accelerate_hero(
-        self, unit, physics=physics
-    ):
-        """Calculate the acceleration changes based on the key pressed."""
-        minspeed = 0
-        rotation = 0
-        speed = self.player.speed
-        topspeed = self.player.stat('speed')
-
-        # Acceleration and turning are configs that modify movement overall.
-        acceleration = physics.get('acceleration', 0.25)
-        turning = physics.get('turning', 25)
-
-        # Make rotation dependent on speed.
-        angle_delta = turning * unit * topspeed
-        # Make acceleration dependent on speed.
-        speed_delta = acceleration * unit * topspeed
-
-        if "w" in self.keysPressed:
-            if speed < topspeed:
-                speed = min(topspeed, speed + speed_delta)
-        if "s" in self.keysPressed:
-            if speed > minspeed:
-                speed = max(minspeed, speed - speed_delta)
-        if "a" in self.keysPressed:
-            rotation += angle_delta
-        if "d" in self.keysPressed:
-            rotation -= angle_delta
-        if "spacebar" in self.keysPressed:
-            self.player.fire()
-
-        self.player.angle += rotation
-        self.player.speed = speed
-
-    def accelerate_hostile(
-        self, unit, physics=physics
-    ):
-        """Calculate the acceleration changes based on the key pressed."""
-        minspeed = 0
-        rotation = 0
-        speed = self.hostile.speed
-        topspeed = self.hostile.stat('speed')
-
-        # Acceleration and turning are configs that modify movement overall.
-        acceleration = physics.get('acceleration', 0.25)
-        turning = physics.get('turning', 25)
-
-        # Make rotation dependent on speed.
-        angle_delta = turning * unit * topspeed
-        # Make acceleration dependent on speed.
-        speed_delta = acceleration * unit * topspeed
-        if self.hostile.destroyed == False:
-            random_select_action = randint(1, 100)
-            if random_select_action < 20:
-                rotation += angle_delta
-            elif random_select_action < 40:
-                rotation -= angle_delta
-            elif random_select_action < 80:
-                if speed < topspeed:
-                    speed = min(topspeed, speed + speed_delta)
-            elif random_select_action < 90:
-                if speed > minspeed:
-                    speed = max(minspeed, speed - speed_delta)
-
-            if random_select_action == 20:
-                self.hostile.fire()
-
-        self.hostile.angle += rotation
-        self.hostile.speed = speed
+        if DEBUG:
+            tracing.trace(KEY_UP, keycode[1])
+        self.keysPressed.discard(keycode[1])
 
     def update(self, dt):
-        """Step the scene forward."""
-        # First, step time forward.
-        self.player.lastfired += dt
-        self.hostile.lastfired += dt
-        self.accelerate_hero(dt)
-        if self.hostile in self.collidables:
-            self.accelerate_hostile(dt)
-
-        # Next, move the objects around the screen
-        self.player.move(windowsize=Window.size)
-        self.hostile.move(windowsize=Window.size)
-        for asteroid in self.asteroids:
-            asteroid.move(windowsize=Window.size)
-        for shell in self.player.shells:
-            shell.move(windowsize=Window.size)
-            if shell.offscreen:
-                self.player.shells.remove(shell)
-                self.remove_widget(shell)
-        for shell in self.hostile.shells:
-            shell.move(windowsize=Window.size)
-            if shell.offscreen:
-                self.hostile.shells.remove(shell)
-                self.remove_widget(shell)
-
-        # Finally, check for any collisions
-        self.detect_collisions(dt)
-
-    def new_remove_widget(self, widget_object, dt):
-        # removes widget from the GameView FloatLayout
-        self.ids.GameView.remove_widget(widget_object)
-
-    def detect_collisions(self, dt):
-        # Creates list of current active shots/shells
-        all_shells = []
-        for shell in self.player.shells:
-            all_shells.append(shell)
-        for shell in self.hostile.shells:
-            all_shells.append(shell)
-
-        # loops through all non-shell objects looking for collisions
-        for object in self.collidables:
-            if object.destroyed == True:
-                pass
-            else:
-                for other_object in self.collidables:
-                    if other_object.destroyed : pass
-                    else:
-                        # ignore self to self matches
-                        if object != other_object:
-                            if object.collide_widget(other_object):
-                                Logger.info(
-                                    'Collision Detection: '
-                                    '{} and {} collided.'.format(object, other_object)
-                                    )
-                                # Checks if players died
-                                if self.player == object or other_object == self.player:
-                                    self.explosion(object, other_object, dt)
-                                    # self.my_popup()
-
-                                else:
-                                    # if non-player collision
-                                    self.explosion(object, other_object, dt)
-
-                # Loops through current active shells checking for collisions
-                for shell in all_shells:
-                    if object.collide_widget(shell):
-                        # BugFix: Ignores any item on collide list marked as destroyed
-                        if object.destroyed == True :
-                            pass
-                        # ignores self friendly fire for player shells
-                        elif object == self.player and shell.origin == "player":
-                            pass
-                        # ignores self friendly fire for hostile shells
-                        elif object == self.hostile and shell.origin == "hostile":
-                            pass
-                        # Triggers round end notification if player collides
-                        elif object == self.player or other_object == self.player:
-                            self.explosion(object, other_object, dt)
-                            self.player_killed_popup()
-                        # Adds points if player shoots something
-                        elif shell.origin == "player":
-                            self.explosion(object, other_object, dt)
-                            self.score += 1
-                            self.score_label.text = str("Score: " + str(self.score))
-                            self.score_label.refresh()
-
-                        # Removes object that collides with shells
-                        else:
-                            self.explosion(object, other_object, dt)
-
-    def explosion(self, obj1, obj2, dt):
-        print("Explosion between %s and %s" % (obj1, obj2))
-        print("----------------Collidable List on Impact: ", self.collidables)
-        Logger.info('Explode: "{}" and "{}" have collided: '.format(obj1, obj2))
-
-        try:
-            self.collidables.remove(obj1)
-        except: pass
-
-        try:
-            self.collidables.remove(obj2)
-        except: pass
-        print("+++++++++++++++Collidable List AFTER Impact", self.collidables)
-        try:
-            obj1.destroyed = True
-        except: pass
-
-        try:
-            obj2.destroyed = True
-        except: pass
-
-        SoundManager.play_sfx(obj1.states['exploded']['sfx'])
-        SoundManager.play_sfx(obj2.states['exploded']['sfx'])
-
-        try:
-            SoundManager.remove_sfx(obj1.states['exploded']['sfx'], obj1)
-        except: pass
-        try:
-            SoundManager.remove_sfx(obj2.states['exploded']['sfx'], obj2)
-        except: pass
-
-        obj1.skin = obj1.states['exploded']['skin']
-        obj2.skin = obj2.states['exploded']['skin']
-
-        Clock.schedule_once(partial(self.new_remove_widget, obj1), .3)
-        Clock.schedule_once(partial(self.new_remove_widget, obj2), .3)
+        """Step the world forward and show the results."""
+        profiler = self.profiler
+        profiler.start_frame()
+        world = self.world
+        world.size = Window.size
+        steps = self.timestep.steps(dt)
+        events = []
+        for step in steps:
+            events.extend(world.step(step, self.keysPressed))
+            if self.recorder is not None:
+                self.recorder.record(world, self.keysPressed)
+
+        for name, body in events:
+            if name == 'fired':
+                SoundManager.play_sfx(body.sfx)
+            elif name == 'exploded':
+                self.explosion(body)
+            elif name == 'killed':
+                self.player_killed_popup()
+        self.add_sounds()
+        profiler.lap('explosions')
+        self.ids.renderer.draw(world.store, self.timestep.alpha)
+
+        if world.score != self.score:
+            self.score = world.score
+            self.score_label.text = str("Score: " + str(self.score))
+            self.score_label.refresh()
+        profiler.lap('render')
+        profiler.end_frame(
+            steps=len(steps),
+            bodies=len(world.store),
+            asteroids=len(world.asteroids),
+            hostiles=len(world.hostiles),
+            shells=len(world.shells),
+            deferred=world.ai.deferred,
+            )
+
+    def follow(self, dt):
+        """Show the latest state the worker published."""
+        profiler = self.profiler
+        profiler.start_frame()
+        worker = self.worker
+        worker.steer(self.keysPressed, Window.size)
+        for name, handle, data in worker.messages():
+            if name == 'spawned':
+                self.subscribe(handle, data)
+            elif name == 'fired':
+                SoundManager.play_sfx(data)
+            elif name == 'exploded':
+                self.explosion(handle, data)
+            elif name == 'killed':
+                self.player_killed_popup()
+        profiler.lap('explosions')
+
+        snapshot = worker.acquire()
+        if snapshot is None:  # Nothing new to draw yet.
+            worker.release()
+            profiler.end_frame()
+            return
+        self.ids.renderer.draw(snapshot, snapshot.alpha(worker.step))
+        steps, self.steps = snapshot.steps - self.steps, snapshot.steps
+        if snapshot.score != self.score:
+            self.score = snapshot.score
+            self.score_label.text = str("Score: " + str(self.score))
+            self.score_label.refresh()
+        profiler.lap('render')
+        profiler.end_frame(
+            steps=steps,
+            bodies=snapshot.bodies,
+            asteroids=snapshot.asteroids,
+            hostiles=snapshot.hostiles,
+            shells=snapshot.shells,
+            deferred=snapshot.deferred,
+            )
+        worker.release()
+
+    def show_profile(self, show=True):
+        """Show or hide the frame timings overlay."""
+        label = self.ids.profile
+        if self.profile_updater is not None:
+            self.profile_updater.cancel()
+            self.profile_updater = None
+        if show:
+            self.profile_updater = Clock.schedule_interval(
+                lambda dt: setattr(label, 'text', self.profiler.report()), 0.5
+                )
+        label.text = self.profiler.report() if show else ''
+        label.opacity = 1 if show else 0
+
+    def add_sounds(self):
+        """Load the sound effects of any ships and asteroids new to play."""
+        for body in self.world.collidables:
+            if body.handle not in self.sounds:
+                self.subscribe(body.handle, sounds(body))
+
+    def subscribe(self, handle, effects):
+        """Load the sound effects of a body.
+
+        Args:
+            handle (int): The body's handle in the world.
+            effects (list): The sound effects the body can make.
+
+        """
+        self.sounds[handle] = effects
+        for sfx in effects:
+            SoundManager.add_sfx(sfx, handle)
+
+            # The screen holds every effect until combat ends so the last
+            # explosion plays out and nothing is loaded twice mid-combat.
+            held = self.sounds.setdefault(self, [])
+            if sfx not in held:
+                SoundManager.add_sfx(sfx, self)
+                held.append(sfx)
+
+    def remove_sounds(self, handle):
+        """Unload the sound effects a body no longer needs."""
+        for sfx in self.sounds.pop(handle, ()):
+            SoundManager.remove_sfx(sfx, handle)
+
+    def explosion(self, body, sfx=None):
+        """Play the sound of a body blowing up.
+
+        Args:
+            body (obj): The body, or its handle when a worker simulates it.
+            sfx (str): The explosion's sound. Defaults to the body's.
+
+        """
+        if INFO:
+            tracing.trace(EXPLODED, body)
+        handle = getattr(body, 'handle', body)
+        SoundManager.play_sfx(sfx or body.states['exploded']['sfx'])
+        self.remove_sounds(handle)
 
     def player_killed_popup(self):
         """ The popup that appears upon player death """
 
         # creates/formats popup content
         content = BoxLayout(orientation='vertical')
-        image = Image(source="deadscreen.png", size_hint=(1, 1))
+        image = Image(
+            texture=assets.texture(screens['Combat']['killed']),
+            size_hint=(1, 1),
+            )
         btn1 = Button(text='Exit', size_hint=(1, .2))
         content.add_widget(image)
         content.add_widget(btn1)
@@ -437,59 +446,32 @@ class CombatScreen(Screen):
         # Opens popup
         popup.open()
 
-    def generate_asteroid(self):
-        positions = []
-        while len(positions) < 10:
-            location = (randint(1, Window.width), randint(1, Window.height))
-            if abs(self.player.pos[0] - location[0]) < 100:
-                pass
-            elif abs(self.player.pos[1] - location[1]) < 100:
-                pass
-            else:
-                positions.append(location)
-        position = choice(positions)
-        asteroid = AsteroidObstacle()
-        asteroid.randomize_trajectory()
-        asteroid.pos = position
-        SoundManager.add_sfx(asteroid.states['exploded']['sfx'], asteroid)
-        self.ids.GameView.add_widget(asteroid)
-        # self.add_widget(asteroid)
-        self.asteroids.append(asteroid)
-        return asteroid
-
-    def init_players(self):
-        """Prepare the player ships."""
-        self.spaceships.append(self.player)
-        SoundManager.add_sfx(
-            self.player.states['exploded']['sfx'],
-            self.player
+    def recording_name(self):
+        """Return a new file in paths['replays'] to record a round to."""
+        makedirs(paths['replays'], exist_ok=True)
+        return path.join(
+            paths['replays'],
+            datetime.now().strftime('round-%Y%m%d-%H%M%S.rpl'),
             )
 
-    def init_hostiles(self, number):
-        """Prepare the level's hostiles."""
-        for i in range(number):
-            self.spaceships.append(self.hostile)
-            SoundManager.add_sfx(
-                self.hostile.states['exploded']['sfx'],
-                self.hostile
-                )
+    def save_recording(self):
+        """Write the round's recording to paths['replays']."""
+        filename = self.recorder.save(self.recording_name())
+        Logger.info('Application: Round recorded to "{}".'.format(filename))
+        self.recorder = None
 
     def start_soundtrack(self):
-        """Choose and play music for the combat scene."""
-        sources = screens['Combat']['music']
-        self.source = choice(sources)
+        """Fade in music for the combat scene."""
+        self.source = MusicManager.play('Combat')
         Logger.info(
             'Application: Chose "{}" as the combat music.'.format(self.source)
             )
-        try:
-            SoundManager.music[self.source]
-        except KeyError:
-            SoundManager.add_music(self.source, self)
-            SoundManager.play_music(self.source)
 
     def stop_soundtrack(self):
-        """Stop the combat scene music."""
-        SoundManager.remove_music(self.source, self)
+        """Fade out the combat scene music."""
+        MusicManager.stop(self.source)
+        MusicManager.prefetch('Intro')
+        MusicManager.prefetch('Combat')
 
 
 class ReturnScreen(Screen):
@@ -515,3 +497,76 @@ class SettingsScreen(Screen):
     def on_pre_enter(self):
         """Perform tasks to ready the scene right before it is switched to."""
         Logger.info('Application: Changed to the Settings screen.')
+
+
+class LazyScreenManager(ScreenManager):
+    """A screen manager that builds each screen the first time it's needed.
+
+    Building every screen at startup decodes every background and builds
+    every widget before the first frame. Instead, screens are listed in
+    `factories` and built when they are first shown or asked for with
+    `get_screen()`. Screens can be prewarmed, one per frame, before they
+    are needed, and released again when memory runs low.
+
+    Attributes:
+        factories (dict): The Factory class name of each screen, keyed by
+            the screen's name.
+        releasable (list): The names of the screens that can be thrown away
+            and built again later.
+
+    """
+
+    factories = DictProperty()
+    releasable = ListProperty()
+
+    def get_screen(self, name):
+        """Return a screen, building it if it hasn't been built yet."""
+        if not self.has_screen(name) and name in self.factories:
+            return self.build_screen(name)
+        return super().get_screen(name)
+
+    def build_screen(self, name):
+        """Build a screen and add it to the manager."""
+        Logger.info('Application: Building the {} screen.'.format(name))
+        screen = Factory.get(self.factories[name])()
+        if screen.name != name:
+            raise ValueError('"{}" built a screen named "{}".'.format(
+                self.factories[name], screen.name
+                ))
+        self.add_widget(screen)
+        return screen
+
+    def prewarm(self, names):
+        """Build screens ahead of time, one each frame.
+
+        Args:
+            names (list): The names of the screens to build.
+
+        """
+        names = [name for name in names if not self.has_screen(name)]
+        if names:
+            self.get_screen(names[0])
+            Clock.schedule_once(lambda dt: self.prewarm(names[1:]))
+
+    def release(self, name):
+        """Throw away a screen so it's built again next time it's needed.
+
+        Returns:
+            bool: False if the screen is showing or was never built.
+
+        """
+        if not self.has_screen(name):
+            return False
+        screen = super().get_screen(name)
+        if screen is self.current_screen:
+            return False
+
+        Logger.info('Application: Releasing the {} screen.'.format(name))
+        if hasattr(screen, 'unload'):
+            screen.unload()
+        self.remove_widget(screen)
+        return True
+
+    def release_unused(self):
+        """Release every releasable screen that isn't showing."""
+        return [name for name in self.releasable if self.release(name)]
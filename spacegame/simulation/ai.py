@@ -0,0 +1,134 @@
+"""Decide which AI ships think each step and keep them within a budget.
+
+Steering every hostile ship every step is wasted on ships far from the
+player or outside the view. The `AIScheduler` gives each ship an interval
+instead: ships near the player think every step, ships further away every
+few steps, and ships outside the world's bounds less often still. Ships
+with the same interval are staggered by row so their thinking is spread
+evenly over the steps. A ship that thinks steers, and rolls its chance to
+fire, for all the time since it last thought, so it moves and fires the
+same way on average.
+
+The ships due to think are steered the most overdue first, then the
+nearest, a batch at a time. Once the step has spent `budget` milliseconds
+on the AI, the rest are deferred to the next step and counted in
+`deferred`. For example::
+
+    world = World(ai=AIScheduler(budget=1.0))
+    world.step(1.0/60.0)
+    print(world.ai.thinking, world.ai.deferred)
+
+A budget makes the simulation depend on how fast the machine is, so leave
+it out when steps must be reproducible.
+
+"""
+from math import inf
+from time import perf_counter
+
+import numpy as np
+
+
+class AIScheduler:
+    """Choose the AI ships that think each step.
+
+    Args:
+        budget (float): The most milliseconds to spend steering each step,
+            or None for no limit.
+        near (float): Ships closer to the player than this many pixels think
+            at the "near" interval.
+        intervals (dict): The steps between each time a ship thinks, for
+            ships that are "near", "visible" and "hidden".
+        batch (int): The number of ships steered between checks of the
+            budget.
+
+    Attributes:
+        deferred (int): The ships that were due last step but ran out of
+            budget.
+        thinking (int): The ships that thought last step.
+        tick (int): The number of steps scheduled so far.
+
+    """
+
+    def __init__(self, budget=None, near=400, intervals=None, batch=64):
+        self.budget = budget
+        self.near = near
+        self.intervals = intervals or {'near': 1, 'visible': 1, 'hidden': 1}
+        self.batch = batch
+        self.deferred = 0
+        self.thinking = 0
+        self.tick = 0
+
+    def schedule(self, world, dt):
+        """Return the AI rows due to think this step, most overdue first.
+
+        Args:
+            world (World): The world being stepped.
+            dt (float): The number of seconds being stepped.
+
+        """
+        store = world.store
+        rows = np.flatnonzero(store.ai[:store.count])
+        store.idle[rows] += dt
+        tick = self.tick
+        self.tick += 1
+        if not len(rows):
+            return rows
+
+        x, y = store.x[rows], store.y[rows]
+        player = world.player
+        if player is not None and not player.destroyed:
+            px, py = player.pos
+            distance = np.hypot(x - px, y - py)
+        else:
+            distance = np.full(len(rows), inf)
+        width, height = world.size
+        visible = (x >= 0) & (x <= width) & (y >= 0) & (y <= height)
+
+        intervals = self.intervals
+        interval = np.where(
+            distance < self.near,
+            intervals['near'],
+            np.where(visible, intervals['visible'], intervals['hidden']),
+            )
+        # Stagger ships by row, and catch up any that were deferred.
+        idle = store.idle[rows]
+        due = (tick + rows) % interval == 0
+        due |= idle > interval * dt + 1e-9
+
+        # The most overdue ships go first so none are deferred forever,
+        # then the nearest.
+        overdue = idle[due] / interval[due]
+        order = np.lexsort((distance[due], -overdue))
+        return rows[due][order]
+
+    def run(self, world, dt, count=None):
+        """Steer the AI ships that are due, within the budget.
+
+        Args:
+            world (World): The world being stepped.
+            dt (float): The number of seconds being stepped.
+            count (int): Steer exactly this many of the due ships instead
+                of timing the budget, e.g. to replay a recorded step.
+
+        """
+        rows = self.schedule(world, dt)
+        store = world.store
+        if count is not None:
+            rows, deferred = rows[:count], len(rows) - count
+            world.steer_hostiles(rows, store.idle[rows], dt)
+            store.idle[rows] = 0
+            self.thinking, self.deferred = len(rows), deferred
+            return
+
+        started = perf_counter()
+        limit = inf if self.budget is None else self.budget / 1000
+        done = 0
+        while done < len(rows):
+            batch = rows[done:done + self.batch]
+            world.steer_hostiles(batch, store.idle[batch], dt)
+            store.idle[batch] = 0
+            done += len(batch)
+            if perf_counter() - started > limit:
+                break
+        self.thinking = done
+        self.deferred = len(rows) - done
@@ -0,0 +1,369 @@
+"""Bodies are the Kivy-free things that fly around a simulated world.
+
+Bodies load from the same modules in spacegame/data as the ship widget in
+spacegame/entities, through the archetypes compiled from them, but they only
+keep what the simulation needs: where they are, where they are going and
+what happens when they are hit. Their motion
+state lives in a row of an `EntityStore` so the world can move them all at
+once.
+
+"""
+from spacegame.archetypes import lookup
+from spacegame.data.objects import obstacles
+from spacegame.data.ships import hostiles, players
+from spacegame.data.weapons import hostiles as hostile_weapons
+from spacegame.data.weapons import players as player_weapons
+from spacegame.simulation.store import EntityStore
+
+
+def column(name, doc):
+    """Return a property that reads and writes a body's row of a column."""
+
+    def get(self):
+        return getattr(self.store, name).item(self.row)
+
+    def set(self, value):
+        getattr(self.store, name)[self.row] = value
+
+    return property(get, set, doc=doc)
+
+
+class Body:
+    """The base body loads common properties from a dataset in data/.
+
+    Args:
+        type (str): The key in the dataset to load the body from.
+        dataset (obj): The module containing the body data.
+        store (EntityStore): The store to keep the body's motion state in.
+        pos (tuple): Where to put the bottom left corner of the body.
+
+    Attributes:
+        ai (bool): True if the AI steers the body.
+        angle (float): The heading of the body in degrees.
+        archetype (Archetype): The data the body's type was loaded from.
+        destroyed (bool): True once the body has been blown up.
+        handle (int): The body's handle in its world's `HandleTable`, or
+            None if it isn't in a world.
+        obj_type (str): The kind of body, e.g. "asteroid".
+        radius (float): The radius of the circle around the body's centre
+            that shells hit. Defaults to half the hit box.
+        origin (str): Who the body fights for. Bodies with the same origin
+            don't shoot each other.
+        pool (Pool): The pool to return the body to once it leaves play, or
+            None if the body is simply thrown away.
+        roster (Roster): The roster the body is in, or None.
+        row (int): The body's row in the store.
+        slot (int): The body's index in its roster.
+        size (tuple): The width and height of the body's hit box.
+        skin (str): The body's image without the path.
+        speed (float): How far the body moves each 60th of a second.
+        sprite_angle (float): The rotation that makes the skin face along
+            the body's heading. Skins are drawn pointing up.
+        sprite_size (tuple): The width and height to draw the skin at.
+        states (dict): The skins and sounds used for other states, e.g. when
+            the body has exploded.
+        store (EntityStore): The store holding the body's motion state.
+        wraps (bool): True if the body wraps around the edges of the world.
+
+    """
+
+    handle = None
+    obj_type = 'body'
+    origin = None
+    pool = None
+    roster = None
+    slot = None
+    size = (50, 50)
+    sprite_angle = -90
+    sprite_size = (75, 75)
+    wraps = True
+
+    ai = column('ai', 'bool: True if the AI steers the body.')
+    angle = column('angle', 'float: The heading of the body in degrees.')
+    radius = column('radius', 'float: The radius of the circle shells hit.')
+    speed = column('speed', 'float: How far the body moves per 1/60 s.')
+
+    def __init__(self, type='entity', dataset=None, store=None, pos=(0, 0)):
+        self.dataset = dataset
+        self.store = store
+        self.row = store.add(self, pos, self.size, self.wraps)
+        self.destroyed = False
+        self.load(type)
+        self.settle()
+
+    def __repr__(self):
+        return '<{} "{}">'.format(self.__class__.__name__, self.type)
+
+    @property
+    def pos(self):
+        """tuple: The bottom left corner of the body."""
+        store, row = self.store, self.row
+        return store.x.item(row), store.y.item(row)
+
+    @pos.setter
+    def pos(self, pos):
+        store, row = self.store, self.row
+        store.x[row], store.y[row] = pos
+
+    @property
+    def skin(self):
+        """str: The body's image without the path."""
+        return self._skin
+
+    @skin.setter
+    def skin(self, skin):
+        self._skin = skin
+        sprite = (skin,) + self.sprite_size + (self.sprite_angle,)
+        self.store.sprite[self.row] = EntityStore.sprite_id(sprite)
+
+    def settle(self):
+        """Draw the body where it is now instead of sliding it there."""
+        self.store.settle(self.row)
+
+    def load(self, type):
+        """Change the body's type to another type in the dataset.
+
+        Args:
+            type (str): The key in the data file to load from.
+
+        """
+        self.type = type
+        self.archetype = archetype = lookup(self.dataset, type)
+        self.skin = archetype.skin
+        self.states = archetype.states
+        self.speed = archetype.speed
+        self.angle = archetype.angle
+        if archetype.radius is not None:
+            self.radius = archetype.radius
+
+    @property
+    def bounds(self):
+        """tuple: The left, bottom, right and top edges of the hit box."""
+        store, row = self.store, self.row
+        x, y = store.x.item(row), store.y.item(row)
+        return x, y, x + store.width.item(row), y + store.height.item(row)
+
+    @property
+    def swept_bounds(self):
+        """tuple: The box covering the hit box's moves during the step."""
+        store, row = self.store, self.row
+        x, y = store.x.item(row), store.y.item(row)
+        prev_x, prev_y = store.prev_x.item(row), store.prev_y.item(row)
+        return (
+            min(x, prev_x),
+            min(y, prev_y),
+            max(x, prev_x) + store.width.item(row),
+            max(y, prev_y) + store.height.item(row),
+            )
+
+    def collide(self, other):
+        """Return True if this body's hit box touches another's.
+
+        This is the same test as Kivy's `Widget.collide_widget`.
+
+        """
+        left, bottom, right, top = self.bounds
+        other_left, other_bottom, other_right, other_top = other.bounds
+        if right < other_left or left > other_right:
+            return False
+        if top < other_bottom or bottom > other_top:
+            return False
+        return True
+
+
+class Asteroid(Body):
+    """Asteroids drift in a straight line until something hits them."""
+
+    obj_type = 'asteroid'
+
+    def __init__(self, type='lg_asteroid', dataset=obstacles, **kwargs):
+        super().__init__(type=type, dataset=dataset, **kwargs)
+
+    def randomize_trajectory(self, random):
+        """Choose a random angle and speed for the asteroid.
+
+        Args:
+            random (random.Random): The random number generator to use.
+
+        """
+        self.angle = random.randint(-360, 360)
+        self.speed = random.randint(1, 5)/2.5
+        self.settle()
+
+
+class Shell(Body):
+    """A shot fired from a ship's weapons.
+
+    Attributes:
+        offscreen (bool): True once the shell has left the world.
+        sfx (str): The sound the weapon makes when fired.
+        stats (Stats): The weapon's stats, shared with its archetype.
+
+    """
+
+    size = (50, 27)
+    sprite_angle = 0
+    sprite_size = (50, 27)
+    wraps = False
+
+    offscreen = column('offscreen', 'bool: True once the shell has left.')
+
+    def __init__(self, type='lasers', dataset=None, origin=None, **kwargs):
+        super().__init__(type=type, dataset=dataset, **kwargs)
+        self.origin = origin
+        self.obj_type = '{}_weapons'.format(origin)
+
+    def load(self, type):
+        """Change the weapon to another type in the dataset.
+
+        Args:
+            type (str): The key in data/weapons to load the data from.
+
+        """
+        super().load(type)
+        self.sfx = self.archetype.sfx
+        self.stats = self.archetype.stats
+
+
+class Ship(Body):
+    """The base ship loads its stats and weapons from data/ships.
+
+    Attributes:
+        lastfired (float): The time since weapons were fired last.
+        stats (Stats): The ship's stats, shared with its archetype.
+        topspeed (float): The fastest the ship can go.
+        weapon (Archetype): The ship's weapons.
+        weapons (obj): The module containing the ship's weapons data.
+        weaponsound (str): The sound the ship's weapons make.
+        weapontype (str): The key that weapons data was loaded from.
+
+    """
+
+    weapons = None
+
+    lastfired = column('lastfired', 'float: Seconds since the ship fired.')
+    topspeed = column('topspeed', 'float: The fastest the ship can go.')
+
+    def load(self, type):
+        """Change the ship's type to another type in the dataset.
+
+        Args:
+            type (str): The key in data/ships to load the stats from.
+
+        """
+        super().load(type)
+        self.stats = self.archetype.stats
+        self.weapontype = self.archetype.weapons
+        self.weapon = lookup(self.weapons, self.weapontype)
+        self.weaponsound = self.weapon.sfx
+        self.lastfired = 0.0
+        self.topspeed = self.stats.speed
+
+    def stat(self, key):
+        """Retrieve a stat value from stats.
+
+        Args:
+            key (str): The name of the stat to get.
+
+        """
+        return getattr(self.stats, key)
+
+    def fire(self, shells):
+        """Fire the ship's weapons if they have recharged.
+
+        Args:
+            shells (Pool): The pool to take the shell from. Nothing is taken
+                unless the shot is actually fired.
+
+        Returns:
+            Shell: The shell that was fired or None if the weapons are not
+            charged.
+
+        """
+        if self.lastfired < self.weapon.stats.recharge:
+            return None
+
+        self.lastfired = 0.0
+
+        # Position the shell in front of the ship.
+        shell = shells.acquire()
+        shell.pos = self.pos
+        shell.angle = self.angle
+        shell.speed = shell.stats.speed
+        shell.settle()
+        return shell
+
+
+class Hostile(Ship):
+    """Hostile ships default to a specific dataset and have modifiers.
+
+    Args:
+        difficulty (str): The key used to look up the difficulty modifier.
+
+    Attributes:
+        difficulty (str): The key the difficulty modifier was loaded from.
+        modifier (float): A factor to apply to stats.
+        stats (Stats): The ship's stats with the modifier applied.
+
+    """
+
+    obj_type = 'hostile_ship'
+    origin = 'hostile'
+    weapons = hostile_weapons
+
+    def __init__(
+        self, type='basic', dataset=hostiles, difficulty=None, **kwargs
+    ):
+        self.difficulty = difficulty
+        super().__init__(type=type, dataset=dataset, **kwargs)
+
+    def load(self, type, difficulty=None):
+        """Change the ship's type to another type in the dataset.
+
+        Args:
+            type (str): The key in data/ships to load the stats from.
+            difficulty (str): The key to load the difficulty from. Defaults
+                to the ship's current difficulty.
+
+        """
+        super().load(type)
+        difficulty = difficulty or self.difficulty
+        self.difficulty = None
+        self.modifier = 1
+        if difficulty is not None:
+            stats = self.archetype.difficulties.get(difficulty)
+            if stats is None:
+                raise KeyError(
+                    '"{}" is not a key in `hostiles`.'.format(difficulty)
+                    )
+
+            self.difficulty = difficulty
+            self.modifier = getattr(self.dataset, difficulty)
+            self.stats = stats
+            self.topspeed = stats.speed
+        self.ai = True
+
+    def stat(self, key, modified=True):
+        """Load the stat with the option to apply the modifier or not.
+
+        Args:
+            key (str): The name of the stat to lookup.
+            modified (bool): Apply the modifier or not. Defaults to True.
+
+        """
+        stats = self.stats if modified else self.archetype.stats
+        return getattr(stats, key)
+
+
+class Player(Ship):
+    """Player ships default to a specific dataset and have access to boosts."""
+
+    obj_type = 'player_ship'
+    origin = 'player'
+    weapons = player_weapons
+
+    def __init__(self, type='basic', dataset=players, **kwargs):
+        super().__init__(type=type, dataset=dataset, **kwargs)
+        self.lives = 3
+        self.exp = 0
+        self.level = 1
@@ -0,0 +1,149 @@
+"""Find the things that might be touching without testing every pair.
+
+The broad phase sorts boxes into a uniform grid of square cells. Only boxes
+that share a cell can collide, so the expensive narrow phase only runs for
+nearby pairs.
+
+Fast bodies can jump clean over a target between two steps, so shells are
+tested with `sweep()` instead: the path a shell took during the step is
+tested against a circle around the target, and a hit anywhere along it
+counts. Every candidate pair is swept at once with NumPy.
+
+"""
+from math import floor
+
+import numpy as np
+
+
+def sweep(x, y, dx, dy, radius):
+    """Return when moving points first come within a radius of the origin.
+
+    Args:
+        x, y (numpy.ndarray): Where each point starts.
+        dx, dy (numpy.ndarray): How far each point moves.
+        radius (numpy.ndarray): The radius of each point's circle around
+            the origin.
+
+    Returns:
+        numpy.ndarray: The fraction of each move, from 0 to 1, at which the
+        point first touches its circle, or infinity if it never does.
+
+    """
+    distance = x * x + y * y - radius * radius
+    length = dx * dx + dy * dy
+    along = x * dx + y * dy
+    discriminant = along * along - length * distance
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time = (-along - np.sqrt(discriminant)) / length
+
+    # Points moving away from or passing by their circle never touch it.
+    touch = (along < 0) & (discriminant >= 0) & (time <= 1)
+    time = np.where(touch, time, np.inf)
+    return np.where(distance <= 0, 0.0, time)  # Some started inside.
+
+
+class SpatialHash:
+    """A uniform grid that buckets axis-aligned boxes by the cells they cover.
+
+    The hash is rebuilt every tick: call `clear()`, `insert()` everything
+    that can be hit and then ask for `pairs()` or `query()` a box.
+
+    Args:
+        cell_size (float): The width and height of a cell. Cells should be
+            about the size of the largest box so most boxes cover 1-4 cells.
+
+    Attributes:
+        cells (dict): Lists of entries keyed by (column, row).
+
+    """
+
+    def __init__(self, cell_size=100):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        """Empty the grid so it can be refilled for the next tick."""
+        self.cells.clear()
+        self.entries.clear()
+
+    def span(self, left, bottom, right, top):
+        """Return the range of cells covered by a box.
+
+        Returns:
+            tuple: The first column, first row, last column and last row.
+
+        """
+        size = self.cell_size
+        return (
+            floor(left / size),
+            floor(bottom / size),
+            floor(right / size),
+            floor(top / size),
+            )
+
+    def insert(self, item, left, bottom, right, top):
+        """Add an item to every cell its box covers.
+
+        Args:
+            item (obj): The thing to store. It is handed back by `pairs()`
+                and `query()`.
+            left, bottom, right, top (float): The item's bounding box.
+
+        """
+        span = self.span(left, bottom, right, top)
+        entry = (item, span)
+        self.entries.append(entry)
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for column in range(x0, x1 + 1):
+            for row in range(y0, y1 + 1):
+                try:
+                    cells[column, row].append(entry)
+                except KeyError:
+                    cells[column, row] = [entry]
+
+    def pairs(self):
+        """Yield every pair of items that share at least one cell.
+
+        Each pair is reported once. Boxes that overlap several cells together
+        are only reported from the first cell they have in common.
+
+        Yields:
+            tuple: Two items whose boxes may be touching.
+
+        """
+        for (column, row), bucket in self.cells.items():
+            for i, (item, span) in enumerate(bucket):
+                for other, other_span in bucket[i + 1:]:
+                    # Skip the pair unless this is the lowest shared cell.
+                    if column != max(span[0], other_span[0]):
+                        continue
+                    if row != max(span[1], other_span[1]):
+                        continue
+                    yield item, other
+
+    def query(self, left, bottom, right, top):
+        """Return the items that share a cell with a box.
+
+        Args:
+            left, bottom, right, top (float): The box to look around.
+
+        Returns:
+            list: Every stored item near the box, each listed once.
+
+        """
+        x0, y0, x1, y1 = self.span(left, bottom, right, top)
+        cells = self.cells
+        if x0 == x1 and y0 == y1:  # The common case of a small box.
+            return [item for item, _ in cells.get((x0, y0), ())]
+
+        found = {}
+        for column in range(x0, x1 + 1):
+            for row in range(y0, y1 + 1):
+                for item, _ in cells.get((column, row), ()):
+                    found[id(item)] = item
+        return list(found.values())
@@ -0,0 +1,96 @@
+"""Keep track of the bodies in play with handles and constant time removal.
+
+A `HandleTable` hands out an integer handle for each body. Handles are made
+of the body's slot and the slot's generation, and the generation changes
+when the body leaves, so a handle kept after its body has gone (say by a
+timer) looks up as None instead of finding whatever took the slot.
+
+A `Roster` is a list of bodies that removes a body by moving the last body
+into its place, so removing bodies costs the same however many there are.
+
+"""
+
+# The number of low bits of a handle holding the slot.
+SLOT_BITS = 20
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+
+class HandleTable:
+    """Hand out generational handles for objects.
+
+    Attributes:
+        generations (list): The current generation of each slot.
+        items (list): The object in each slot, or None if it's free.
+        free (list): The slots waiting to be reused.
+
+    """
+
+    def __init__(self):
+        self.generations = []
+        self.items = []
+        self.free = []
+
+    def __len__(self):
+        return len(self.items) - len(self.free)
+
+    def __contains__(self, handle):
+        return self.get(handle) is not None
+
+    def add(self, item):
+        """Put an object in a free slot and return its handle."""
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.items)
+            self.items.append(None)
+            self.generations.append(0)
+        self.items[slot] = item
+        return self.generations[slot] << SLOT_BITS | slot
+
+    def get(self, handle):
+        """Return the object a handle refers to, or None if it's gone."""
+        slot = handle & SLOT_MASK
+        if self.generations[slot] != handle >> SLOT_BITS:
+            return None
+        return self.items[slot]
+
+    def remove(self, handle):
+        """Free an object's slot so its handle no longer finds anything.
+
+        Returns:
+            bool: False if the handle was already stale.
+
+        """
+        slot = handle & SLOT_MASK
+        if self.generations[slot] != handle >> SLOT_BITS:
+            return False
+        self.items[slot] = None
+        self.generations[slot] += 1
+        self.free.append(slot)
+        return True
+
+
+class Roster(list):
+    """A list of bodies that doesn't keep its order when bodies leave.
+
+    Bodies remember their index in the roster as `slot` and the roster as
+    `roster`, so a body can only be in one roster at a time.
+
+    """
+
+    def add(self, body):
+        """Add a body to the end of the roster."""
+        body.roster = self
+        body.slot = len(self)
+        self.append(body)
+
+    def discard(self, body):
+        """Take a body out by moving the last body into its place."""
+        if body.roster is not self:
+            return
+        last = self.pop()
+        if last is not body:
+            self[body.slot] = last
+            last.slot = body.slot
+        body.roster = None
+        body.slot = None
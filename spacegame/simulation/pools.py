@@ -0,0 +1,86 @@
+"""Recycle short-lived objects instead of building new ones.
+
+Ships can fire many times a second. Building a shell loads its data and
+building a widget for it applies a kv rule, so both are built once, handed
+out when a shot is fired and handed back when the shot is over.
+
+"""
+from spacegame.simulation.bodies import Shell
+from spacegame.simulation.store import EntityStore
+
+
+class Pool:
+    """A stack of objects waiting to be reused.
+
+    Args:
+        factory (callable): Builds a new object when the pool is empty.
+        size (int): The number of objects to build up front.
+
+    Attributes:
+        free (list): The objects waiting to be handed out.
+
+    """
+
+    def __init__(self, factory, size=0):
+        self.factory = factory
+        self.free = [factory() for i in range(size)]
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self):
+        """Hand out a free object, building one if there are none left."""
+        try:
+            return self.free.pop()
+        except IndexError:
+            return self.factory()
+
+    def release(self, item):
+        """Take an object back so it can be handed out again."""
+        self.free.append(item)
+
+
+class ShellPool(Pool):
+    """A pool of shells for one type of weapon.
+
+    Free shells are parked in a store of their own so they keep a row, but
+    are never moved or collided. Acquiring a shell moves it into the world's
+    store and releasing it parks it again.
+
+    Args:
+        type (str): The key in data/weapons to load the shells from.
+        dataset (obj): The module containing the weapons data.
+        origin (str): Who fires the shells, e.g. "player".
+        store (EntityStore): The store that fired shells fly in.
+        size (int): The number of shells to build up front.
+
+    Attributes:
+        parked (EntityStore): The store holding the free shells.
+
+    """
+
+    def __init__(self, type, dataset, origin, store, size=0):
+        self.store = store
+        self.parked = EntityStore(capacity=max(size, 1))
+
+        def factory():
+            shell = Shell(
+                type=type, dataset=dataset, origin=origin, store=self.parked
+                )
+            shell.pool = self
+            return shell
+
+        super().__init__(factory, size)
+
+    def acquire(self):
+        """Hand out a shell that is ready to fly in the world's store."""
+        shell = super().acquire()
+        self.store.adopt(shell)
+        shell.destroyed = False
+        shell.offscreen = False
+        return shell
+
+    def release(self, shell):
+        """Park a shell that has hit something or left the world."""
+        self.parked.adopt(shell)
+        super().release(shell)
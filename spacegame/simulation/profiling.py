@@ -0,0 +1,177 @@
+"""Time each phase of a combat frame to find out where the time goes.
+
+A `Profiler` is a lap timer. Each phase of a frame calls `lap()` when it
+finishes, which costs one `perf_counter()` call, and the lap times are
+added up until the frame ends. The last frames are kept so percentiles can
+be shown in game and the whole session exported when the game closes. For
+example::
+
+    profiler = Profiler()
+    world = World(profiler=profiler)
+    profiler.start_frame()
+    world.step(1.0/60.0)
+    profiler.end_frame(bodies=len(world.store))
+    print(profiler.report())
+
+"""
+import csv
+import json
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from os import makedirs, path
+from time import perf_counter
+
+
+class Profiler:
+    """Collect the time spent in each phase of each frame.
+
+    Args:
+        window (int): The number of recent frames to take percentiles of.
+        history (int): The number of frames to keep for exporting.
+        enabled (bool): False to make every method do nothing.
+
+    Attributes:
+        current (dict): The milliseconds spent in each phase this frame.
+        enabled (bool): True while frames are being timed.
+        frames (collections.deque): A row of `columns` for each frame.
+
+    """
+
+    # The phases of a frame, in the order they run.
+    phases = (
+        'cleanup',     # Recycling shells and freeing exploded bodies.
+        'spawning',    # Spawning the level's bodies that are due.
+        'input',       # Steering and firing the player's ship.
+        'ai',          # Steering and firing the hostile ships.
+        'movement',    # Moving the bodies.
+        'collisions',  # Exploding bodies that touch, dropping spent shells.
+        'explosions',  # Playing the sounds and popups for events.
+        'render',      # Rebuilding the meshes.
+        )
+    counters = (
+        'steps', 'bodies', 'asteroids', 'hostiles', 'shells', 'deferred',
+        )
+    columns = phases + ('frame',) + counters
+    percentiles = (50, 95, 99)
+
+    def __init__(self, window=600, history=36000, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.frames = deque(maxlen=history)
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.started = self.last = perf_counter()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def start_frame(self):
+        """Start timing a new frame."""
+        if not self.enabled:
+            return
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.started = self.last = perf_counter()
+
+    def lap(self, phase):
+        """Add the time since the last lap to a phase.
+
+        Args:
+            phase (str): One of `phases`.
+
+        """
+        if not self.enabled:
+            return
+        now = perf_counter()
+        self.current[phase] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self, **counts):
+        """Finish timing a frame and record it.
+
+        Args:
+            **counts (int): The number of each thing in `counters` in play.
+
+        """
+        if not self.enabled:
+            return
+        current = self.current
+        frame = (perf_counter() - self.started) * 1000
+        self.frames.append(
+            tuple(current[phase] for phase in self.phases)
+            + (frame,)
+            + tuple(counts.get(counter, 0) for counter in self.counters)
+            )
+
+    def summary(self, frames=None):
+        """Return the percentiles and maximum of every column.
+
+        Args:
+            frames (int): The number of recent frames to summarise. Defaults
+                to `window`.
+
+        Returns:
+            dict: A dict of "p50", "p95", "p99" and "max" for each column.
+
+        """
+        frames = list(islice(reversed(self.frames), frames or self.window))
+        summary = {}
+        for index, column in enumerate(self.columns):
+            values = sorted(row[index] for row in frames) or [0]
+            last = len(values) - 1
+            stats = {
+                'p{}'.format(p): values[round(last * p / 100)]
+                for p in self.percentiles
+                }
+            stats['max'] = values[-1]
+            summary[column] = stats
+        return summary
+
+    def report(self):
+        """Return the recent timings as a table of text for an overlay."""
+        summary = self.summary()
+        lines = ['{:<11}{:>7}{:>7}{:>7}{:>7}'.format(
+            'ms', 'p50', 'p95', 'p99', 'max'
+            )]
+        row = '{:<11}{p50:7.2f}{p95:7.2f}{p99:7.2f}{max:7.2f}'
+        for column in self.phases + ('frame',):
+            lines.append(row.format(column, **summary[column]))
+        if self.frames:
+            last = self.frames[-1]
+            counts = last[len(self.phases) + 1:]
+            lines.append(' '.join(
+                '{} {}'.format(counter, count)
+                for counter, count in zip(self.counters, counts)
+                ))
+        return '\n'.join(lines)
+
+    def export(self, directory):
+        """Write every recorded frame to CSV and a summary to JSON.
+
+        Args:
+            directory (str): The folder to write the files to.
+
+        Returns:
+            tuple: The paths of the CSV and JSON files, or None if no frames
+            have been recorded.
+
+        """
+        if not self.frames:
+            return None
+
+        makedirs(directory, exist_ok=True)
+        name = datetime.now().strftime('profile-%Y%m%d-%H%M%S')
+        csv_path = path.join(directory, name + '.csv')
+        json_path = path.join(directory, name + '.json')
+
+        with open(csv_path, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(self.columns)
+            writer.writerows(self.frames)
+
+        with open(json_path, 'w') as output:
+            json.dump({
+                'frames': len(self.frames),
+                'summary': self.summary(len(self.frames)),
+                }, output, indent=4)
+
+        return csv_path, json_path
@@ -0,0 +1,246 @@
+"""Record the inputs of a round of combat and replay it step for step.
+
+A world is deterministic given its settings, its seed, and what happens each
+step: the keys held down, the size of the world and how many AI ships the
+budget let think. A `Recorder` keeps those three things for every step,
+packed into 7 bytes, and saves them with the settings to a small binary
+file. A `Replay` loads the file and steps a new world through exactly the
+same round, as fast as it can or at any multiple of real time.
+
+Replay a recorded round from the command line, for example to profile it::
+
+    python3 -m spacegame.simulation.replay replays/round.rpl --profile
+
+The file starts with the magic bytes "SDRP", a version byte and the length
+of the settings, followed by the settings as JSON and then the steps,
+compressed with zlib.
+
+"""
+import json
+import struct
+import zlib
+from argparse import ArgumentParser
+from time import perf_counter, sleep
+
+from spacegame.simulation.ai import AIScheduler
+from spacegame.simulation.profiling import Profiler
+from spacegame.simulation.world import World
+
+MAGIC = b'SDRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBI')
+
+# The keys held down, the AI ships that thought and the size of the world.
+STEP = struct.Struct('<BHHH')
+
+# The keys the player can hold, in bit order.
+KEYS = ('w', 'a', 's', 'd', 'spacebar')
+
+
+def build_world(settings, size, profiler=None):
+    """Build a round's world as it is before the first step.
+
+    Args:
+        settings (dict): The "seed", "difficulty", "physics", "pool_size",
+            "ai", "shiptype", "level" and "spawn_budget" of the round.
+        size (tuple): The width and height of the world.
+        profiler (Profiler): Times the phases of each step.
+
+    """
+    world = World(
+        size=size,
+        physics=settings['physics'],
+        difficulty=settings['difficulty'],
+        seed=settings['seed'],
+        pool_size=settings['pool_size'],
+        profiler=profiler,
+        ai=AIScheduler(**settings['ai']),
+        )
+    world.start(
+        settings['shiptype'], settings['level'], settings['spawn_budget']
+        )
+    return world
+
+
+def pack_inputs(inputs):
+    """Return the keys held down as a bit mask."""
+    mask = 0
+    for bit, key in enumerate(KEYS):
+        if key in inputs:
+            mask |= 1 << bit
+    return mask
+
+
+def unpack_inputs(mask):
+    """Return the set of keys in a bit mask."""
+    return {key for bit, key in enumerate(KEYS) if mask & 1 << bit}
+
+
+class Recorder:
+    """Record every step of a round of combat.
+
+    Args:
+        **settings: Everything needed to build the round's world again, see
+            `build_world()`. "rate" is the number of steps a second.
+
+    Attributes:
+        settings (dict): The settings the round was built with.
+        steps (bytearray): The packed steps recorded so far.
+
+    """
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self.steps = bytearray()
+
+    def __len__(self):
+        return len(self.steps) // STEP.size
+
+    def record(self, world, inputs):
+        """Record a step once the world has taken it.
+
+        Args:
+            world (World): The world that was stepped.
+            inputs (set): The keys that were held down during the step.
+
+        """
+        width, height = world.size
+        self.steps += STEP.pack(
+            pack_inputs(inputs), world.ai.thinking, int(width), int(height)
+            )
+
+    def save(self, filename):
+        """Write the recording to a file."""
+        settings = json.dumps(self.settings).encode('utf-8')
+        with open(filename, 'wb') as output:
+            output.write(HEADER.pack(MAGIC, VERSION, len(settings)))
+            output.write(settings)
+            output.write(zlib.compress(bytes(self.steps)))
+        return filename
+
+
+class Replay:
+    """A recorded round of combat that can be stepped through again.
+
+    Args:
+        settings (dict): The settings the round was built with.
+        steps (bytes): The packed steps.
+
+    Attributes:
+        settings (dict): The settings the round was built with.
+        steps (list): The (inputs, thinking, size) of each step.
+
+    """
+
+    def __init__(self, settings, steps):
+        self.settings = settings
+        self.steps = [
+            (unpack_inputs(mask), thinking, (width, height))
+            for mask, thinking, width, height in STEP.iter_unpack(steps)
+            ]
+
+    def __len__(self):
+        return len(self.steps)
+
+    @classmethod
+    def load(cls, filename):
+        """Load a recording saved by a `Recorder`.
+
+        Raises:
+            ValueError: If the file isn't a recording this version can read.
+
+        """
+        with open(filename, 'rb') as recording:
+            data = recording.read()
+        magic, version, length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('"{}" is not a version {} recording.'.format(
+                filename, VERSION
+                ))
+        start = HEADER.size + length
+        settings = json.loads(data[HEADER.size:start].decode('utf-8'))
+        return cls(settings, zlib.decompress(data[start:]))
+
+    @property
+    def dt(self):
+        """float: The seconds each step simulates."""
+        return 1.0 / self.settings['rate']
+
+    def world(self, profiler=None):
+        """Build the round's world as it was before the first step.
+
+        Args:
+            profiler (Profiler): Times the phases of each step.
+
+        """
+        size = self.steps[0][2] if self.steps else (800, 600)
+        return build_world(self.settings, size, profiler)
+
+    def play(self, world=None, speed=None):
+        """Step a world through the recording.
+
+        Args:
+            world (World): The world to step. Defaults to a new one.
+            speed (float): How many times faster than real time to play, or
+                None to play as fast as possible.
+
+        Yields:
+            list: The events of each step.
+
+        """
+        world = world or self.world()
+        dt = self.dt
+        started = perf_counter()
+        for index, (inputs, thinking, size) in enumerate(self.steps):
+            if speed is not None:
+                wait = started + index * dt / speed - perf_counter()
+                if wait > 0:
+                    sleep(wait)
+            world.size = size
+            yield world.step(dt, inputs, thinking)
+
+
+def main(args=None):
+    """Replay a recording headless and report how it went."""
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument('recording', help='a file saved by a Recorder')
+    parser.add_argument(
+        '--speed', type=float, default=None,
+        help='times faster than real time, as fast as possible by default',
+        )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='print the time each phase of a step took',
+        )
+    options = parser.parse_args(args)
+
+    replay = Replay.load(options.recording)
+    profiler = Profiler(window=len(replay), history=len(replay))
+    world = replay.world(profiler)
+    started = perf_counter()
+    profiler.start_frame()
+    for events in replay.play(world, options.speed):
+        profiler.end_frame(
+            steps=1,
+            bodies=len(world.store),
+            asteroids=len(world.asteroids),
+            hostiles=len(world.hostiles),
+            shells=len(world.shells),
+            deferred=world.ai.deferred,
+            )
+        profiler.start_frame()
+    elapsed = perf_counter() - started
+
+    simulated = len(replay) * replay.dt
+    print('Replayed {} steps ({:.1f}s) in {:.2f}s, {:.0f}x real time.'.format(
+        len(replay), simulated, elapsed, simulated / max(elapsed, 1e-9)
+        ))
+    print('Score {}, player {}.'.format(
+        world.score, 'destroyed' if world.player.destroyed else 'alive'
+        ))
+    if options.profile:
+        print(profiler.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Keep the motion state of every body in contiguous NumPy arrays.
+
+Moving bodies one at a time costs a Python call, a rotation and a handful of
+attribute writes each. The store keeps positions, headings and speeds as
+columns instead, so a whole world is moved with a few array operations no
+matter how many bodies are in it.
+
+"""
+import numpy as np
+
+
+class EntityStore:
+    """A struct of arrays holding one row per body.
+
+    Rows `0` to `count - 1` are in use and always packed together. Removing a
+    body moves the last row into its place so the arrays never have holes.
+
+    Args:
+        capacity (int): The number of rows to allocate up front. The store
+            doubles in size whenever it runs out of rows.
+
+    Attributes:
+        count (int): The number of rows in use.
+        owners (list): The body using each row.
+        x, y (numpy.ndarray): The bottom left corner of each body.
+        angle (numpy.ndarray): The heading of each body in degrees.
+        prev_x, prev_y, prev_angle (numpy.ndarray): Where each body was and
+            which way it faced at the start of the last step. Views draw
+            bodies between their previous and current states.
+        speed (numpy.ndarray): How far each body moves each 60th of a
+            second.
+        topspeed (numpy.ndarray): The fastest each ship can go.
+        lastfired (numpy.ndarray): The seconds since each ship last fired.
+        idle (numpy.ndarray): The seconds since the AI last steered each
+            ship.
+        width, height (numpy.ndarray): The size of each body's hit box.
+        radius (numpy.ndarray): The radius of the circle around each body's
+            centre that shells hit.
+        sprite (numpy.ndarray): The index of each body's entry in `sprites`.
+        wrap (numpy.ndarray): True for bodies that wrap around the edges of
+            the world, False for bodies that fly off it.
+        offscreen (numpy.ndarray): True for bodies that have left the world.
+        ai (numpy.ndarray): True for the ships the AI steers.
+        sprites (list): The (skin, width, height, rotation) of every sprite
+            any store has seen. The list is shared so rows can move between
+            stores.
+
+    """
+
+    floats = (
+        'x', 'y', 'angle', 'prev_x', 'prev_y', 'prev_angle', 'speed', 'width',
+        'height', 'radius', 'topspeed', 'lastfired', 'idle',
+        )
+    ints = ('sprite',)
+    flags = ('wrap', 'offscreen', 'ai')
+    columns = floats + ints + flags
+
+    sprites = []
+    sprite_ids = {}
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.owners = []
+        for name in self.floats:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        for name in self.ints:
+            setattr(self, name, np.zeros(capacity, dtype=np.int32))
+        for name in self.flags:
+            setattr(self, name, np.zeros(capacity, dtype=bool))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        """int: The number of rows allocated."""
+        return len(self.x)
+
+    @classmethod
+    def sprite_id(cls, sprite):
+        """Return the index of a sprite in `sprites`, adding it if it's new.
+
+        Args:
+            sprite (tuple): The skin, the width and height to draw it at and
+                the rotation in degrees that makes it face along angle 0.
+
+        """
+        try:
+            return cls.sprite_ids[sprite]
+        except KeyError:
+            cls.sprite_ids[sprite] = len(cls.sprites)
+            cls.sprites.append(sprite)
+            return cls.sprite_ids[sprite]
+
+    def grow(self):
+        """Double the number of rows allocated."""
+        capacity = 2 * self.capacity
+        for name in self.columns:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def append(self, body):
+        """Claim the next free row for a body and return its index."""
+        if self.count == self.capacity:
+            self.grow()
+
+        row = self.count
+        self.count += 1
+        self.owners.append(body)
+        return row
+
+    def add(self, body, pos, size, wrap):
+        """Give a body a row and return the row's index.
+
+        Args:
+            body (Body): The body that owns the row.
+            pos (tuple): Where the body is.
+            size (tuple): The width and height of the body's hit box.
+            wrap (bool): True if the body wraps around the edges.
+
+        """
+        row = self.append(body)
+        self.x[row], self.y[row] = pos
+        self.width[row], self.height[row] = size
+        self.radius[row] = min(size) / 2
+        self.angle[row] = 0
+        self.settle(row)
+        self.speed[row] = 0
+        self.topspeed[row] = 0
+        self.lastfired[row] = 0
+        self.idle[row] = 0
+        self.sprite[row] = 0
+        self.wrap[row] = wrap
+        self.offscreen[row] = False
+        self.ai[row] = False
+        return row
+
+    def adopt(self, body):
+        """Move a body and its row from another store into this one."""
+        old, old_row = body.store, body.row
+        row = self.append(body)
+        for name in self.columns:
+            getattr(self, name)[row] = getattr(old, name)[old_row]
+        old.remove(body)
+
+        body.store = self
+        body.row = row
+        return row
+
+    def remove(self, body):
+        """Free a body's row by moving the last row into it.
+
+        The body is detached from the store, so reading its position
+        afterwards is an error.
+
+        """
+        row = body.row
+        last = self.count - 1
+        if row != last:
+            for name in self.columns:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved = self.owners[last]
+            self.owners[row] = moved
+            moved.row = row
+
+        self.owners.pop()
+        self.count = last
+        body.store = None
+        body.row = None
+
+    def settle(self, rows):
+        """Make bodies' current state their previous state too.
+
+        Settled bodies are drawn where they are now instead of sliding there
+        from where they were, e.g. after jumping across the world.
+
+        Args:
+            rows (int or numpy.ndarray): The rows to settle.
+
+        """
+        self.prev_x[rows] = self.x[rows]
+        self.prev_y[rows] = self.y[rows]
+        self.prev_angle[rows] = self.angle[rows]
+
+    def snapshot(self):
+        """Remember every body's state before a step changes it."""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self.prev_angle[:n] = self.angle[:n]
+
+    def integrate(self, size, frames=1.0):
+        """Move every body along its heading.
+
+        Bodies that wrap reappear on the far side of the world. Bodies that
+        don't are marked offscreen once they leave it.
+
+        Args:
+            size (tuple): The width and height of the world.
+            frames (float): How long to move for, in 60ths of a second.
+
+        Returns:
+            numpy.ndarray: The rows that went offscreen during this step.
+
+        """
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        radians = np.radians(self.angle[:n])
+        speed = self.speed[:n] * frames
+        x += speed * np.cos(radians)
+        y += speed * np.sin(radians)
+
+        width, height = size
+        left, right = x < -5, x > width
+        bottom, top = y < -5, y > height
+
+        # Wrap the screen.
+        wrap = self.wrap[:n]
+        x[wrap & left] = width
+        x[wrap & right] = 0
+        y[wrap & bottom] = height
+        y[wrap & top] = 0
+        self.settle(np.flatnonzero(wrap & (left | right | bottom | top)))
+
+        # Mark offscreen projectiles for deletion.
+        offscreen = self.offscreen[:n]
+        gone = (left | right | bottom | top) & ~wrap & ~offscreen
+        offscreen |= gone
+        return np.flatnonzero(gone)
@@ -0,0 +1,80 @@
+"""Run many delayed actions from one wheel of time slots.
+
+Scheduling a clock event for each thing that has to happen later, like
+clearing away an explosion, costs a heap push and pop per event. A
+`TimerWheel` drops each timer into the slot for the tick it's due on, and
+advancing the wheel only looks at the slots of the ticks that have passed.
+
+"""
+from math import ceil, floor
+
+
+class TimerWheel:
+    """A circular array of slots, one for each tick.
+
+    Timers further away than one turn of the wheel wait in their slot until
+    the wheel comes round to them again.
+
+    Args:
+        resolution (float): The seconds in a tick. Timers fire on the first
+            tick at or after they are due.
+        slots (int): The number of ticks in one turn of the wheel.
+
+    Attributes:
+        tick (int): The next tick to be handled.
+        wheel (list): The (tick, item) of each timer in each slot.
+
+    """
+
+    def __init__(self, resolution=1.0/60.0, slots=256):
+        self.resolution = resolution
+        self.slots = slots
+        self.wheel = [[] for slot in range(slots)]
+        self.tick = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, due, item):
+        """Add a timer.
+
+        Args:
+            due (float): The time in seconds the timer is due.
+            item (obj): What to hand back when the timer fires.
+
+        """
+        tick = max(ceil(due / self.resolution - 1e-9), self.tick)
+        self.wheel[tick % self.slots].append((tick, item))
+        self.count += 1
+
+    def advance(self, now):
+        """Move the wheel on to a time and return the timers that fired.
+
+        Args:
+            now (float): The current time in seconds.
+
+        Returns:
+            list: The items of the timers due by now, in the order they
+            were due.
+
+        """
+        target = floor(now / self.resolution + 1e-9)
+        if target < self.tick:
+            return []
+
+        fired = []
+        # Each slot only needs looking at once, however long it's been.
+        last = min(target, self.tick + self.slots - 1)
+        for tick in range(self.tick, last + 1):
+            slot = self.wheel[tick % self.slots]
+            if not slot:
+                continue
+            waiting = []
+            for timer in slot:
+                (fired if timer[0] <= target else waiting).append(timer)
+            slot[:] = waiting
+        self.tick = target + 1
+        self.count -= len(fired)
+        fired.sort(key=lambda timer: timer[0])
+        return [item for tick, item in fired]
@@ -0,0 +1,62 @@
+"""Step a simulation at a fixed rate however fast frames are drawn.
+
+Stepping a world by each frame's `dt` makes the game speed up and slow down
+with the frame rate. An accumulator instead banks the time between frames
+and spends it in steps of a fixed size, so the simulation always runs at the
+same rate. What's left over is how far the drawing is between the last two
+steps. For example::
+
+    timestep = FixedTimestep(rate=60)
+    for step in timestep.steps(dt):
+        world.step(step, inputs)
+    renderer.draw(world.store, timestep.alpha)
+
+"""
+
+
+class FixedTimestep:
+    """An accumulator that turns frame times into fixed size steps.
+
+    Args:
+        rate (int): The number of steps to simulate each second.
+        max_steps (int): The most steps to simulate in one frame. When a
+            frame takes longer than that, the rest of its time is dropped
+            so the simulation never falls further and further behind.
+
+    Attributes:
+        accumulator (float): The seconds banked but not yet simulated.
+        dropped (float): The seconds dropped to catch up so far.
+        step (float): The number of seconds in each step.
+
+    """
+
+    def __init__(self, rate=60, max_steps=5):
+        self.step = 1.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0.0
+
+    @property
+    def alpha(self):
+        """float: How far between the last two steps to draw, from 0 to 1."""
+        return min(self.accumulator / self.step, 1.0)
+
+    def steps(self, dt):
+        """Bank a frame's time and return the steps to simulate for it.
+
+        Args:
+            dt (float): The number of seconds since the last frame.
+
+        Returns:
+            list: The size of each step in seconds.
+
+        """
+        self.accumulator += dt
+        count = int(self.accumulator / self.step)
+        if count > self.max_steps:
+            dropped = (count - self.max_steps) * self.step
+            self.dropped += dropped
+            self.accumulator -= dropped
+            count = self.max_steps
+        self.accumulator -= count * self.step
+        return [self.step] * count
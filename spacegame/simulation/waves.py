@@ -0,0 +1,133 @@
+"""Spawn the waves of a level a few bodies at a time.
+
+Levels are data modules in spacegame/data/levels. Spawning a body adds a row
+to the store, builds its shell pool and, in game, loads its sounds, so
+spawning a whole wave in one frame used to be the biggest hitch of a round.
+The `WaveScheduler` spawns each body when it is due, but never more than
+`budget` bodies in one step; anything over the budget waits for the next
+step. For example::
+
+    world = World(seed=1)
+    world.spawn_player('fast')
+    world.waves = WaveScheduler(load_level(1), budget=2)
+    world.step(1.0/60.0)  # Spawns the first two bodies.
+
+"""
+import re
+from collections import deque
+from importlib import import_module
+from pkgutil import iter_modules
+
+from spacegame.archetypes import lookup
+from spacegame.data.objects import obstacles
+from spacegame.data.ships import hostiles
+
+# The dataset each kind of spawn loads its type from.
+KINDS = {'asteroid': obstacles, 'hostile': hostiles}
+
+
+def levels():
+    """Return the numbers of the levels in spacegame/data/levels, in order."""
+    package = import_module('spacegame.data.levels')
+    numbers = []
+    for module in iter_modules(package.__path__):
+        match = re.fullmatch(r'level(\d+)', module.name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+
+def load_level(number):
+    """Return the checked waves of a level in spacegame/data/levels.
+
+    Args:
+        number (int): The level to load, e.g. 1 for level1.py.
+
+    Raises:
+        KeyError: If there is no such level.
+        ValueError: If a spawn has an unknown kind or type.
+
+    """
+    name = 'spacegame.data.levels.level{}'.format(number)
+    try:
+        level = import_module(name)
+    except ImportError:
+        raise KeyError('There is no level {}.'.format(number)) from None
+
+    for wave in level.waves:
+        for spawn in wave['spawns']:
+            if spawn['kind'] not in KINDS:
+                raise ValueError('{} spawns an unknown kind "{}".'.format(
+                    name, spawn['kind']
+                    ))
+            try:
+                lookup(KINDS[spawn['kind']], spawn['type'])
+            except KeyError as error:
+                raise ValueError('{} spawns {}'.format(name, error)) from None
+    return level.waves
+
+
+class WaveScheduler:
+    """Spawn a level's bodies as they fall due, a few each step.
+
+    Args:
+        waves (list): The waves to spawn, see `load_level()`.
+        budget (int): The most bodies to spawn in one step.
+
+    Attributes:
+        budget (int): The most bodies to spawn in one step.
+        late (int): The bodies that were due but waited for a later step
+            last time the scheduler spawned.
+        pending (collections.deque): The (time, kind, type, pos) of each
+            body left to spawn, soonest first.
+
+    """
+
+    def __init__(self, waves, budget=2):
+        spawns = []
+        for wave in waves:
+            time = wave.get('start', 0)
+            interval = wave.get('interval', 0)
+            for spawn in wave['spawns']:
+                for i in range(spawn.get('count', 1)):
+                    spawns.append(
+                        (time, spawn['kind'], spawn['type'], spawn.get('pos'))
+                        )
+                    time += interval
+        spawns.sort(key=lambda spawn: spawn[0])
+        self.pending = deque(spawns)
+        self.budget = budget
+        self.late = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def spawn(self, world):
+        """Spawn the bodies that are due, up to the budget.
+
+        Args:
+            world (World): The world to spawn into. Its time decides what
+                is due.
+
+        Returns:
+            list: The bodies spawned.
+
+        """
+        pending = self.pending
+        spawned = []
+        while pending and pending[0][0] <= world.time:
+            if len(spawned) == self.budget:
+                break
+            time, kind, type, pos = pending.popleft()
+            if kind == 'hostile':
+                spawned.append(world.spawn_hostile(type, pos))
+            else:
+                spawned.append(world.spawn_asteroid(type, pos))
+
+        late = 0
+        for time, kind, type, pos in pending:
+            if time > world.time:
+                break
+            late += 1
+        self.late = late
+        return spawned
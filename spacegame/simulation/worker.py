@@ -0,0 +1,494 @@
+"""Step a round of combat on a worker thread or process instead of the view's.
+
+When the view steps the world itself, a long layout, texture upload or popup
+holds up the simulation, and a busy simulation holds up drawing. A
+`SimulationWorker` steps the world at a fixed rate on a thread, or on a
+process so it gets a core of its own, and publishes the state views draw
+from as double buffered `Snapshot`s:
+
+    worker = SimulationWorker(settings, size=(800, 600), mode='process')
+    worker.start()
+    # Each frame:
+    worker.steer({'w'}, (800, 600))
+    for name, handle, data in worker.messages():
+        ...
+    snapshot = worker.acquire()
+    if snapshot is not None:
+        renderer.draw(snapshot, snapshot.alpha(worker.step))
+    worker.release()
+
+The worker writes each snapshot into whichever buffer the view isn't
+holding, so neither side waits for the other. In a process, the buffers
+live in `multiprocessing.shared_memory`. Bodies can't be shared, so views
+hear about them through messages keyed by their handles instead. A message
+is a (name, handle, data) tuple:
+
+    spawned - A ship or asteroid entered play. data is the list of sound
+        effects it can make.
+    fired - A shell was fired. data is its sound effect.
+    exploded - The body was destroyed. data is its explosion's sound.
+    killed - The player was shot down.
+    sprites - New sprites were seen. handle is the index of the first of
+        them in the worker's `EntityStore.sprites` and data is the list.
+    failed - The worker stopped with an error. data is the traceback.
+
+"""
+import multiprocessing
+import queue
+import threading
+import traceback
+from multiprocessing import shared_memory
+from time import monotonic, sleep
+
+import numpy as np
+
+from spacegame.simulation.replay import (
+    Recorder, build_world, pack_inputs, unpack_inputs
+    )
+from spacegame.simulation.store import EntityStore
+from spacegame.simulation.timestep import FixedTimestep
+
+MODES = ('thread', 'process')
+
+# The store columns views draw from.
+COLUMNS = (
+    ('x', np.float64),
+    ('y', np.float64),
+    ('angle', np.float64),
+    ('prev_x', np.float64),
+    ('prev_y', np.float64),
+    ('prev_angle', np.float64),
+    ('width', np.float64),
+    ('height', np.float64),
+    ('sprite', np.int32),
+    ('offscreen', np.bool_),
+    )
+
+# The counts and times at the top of each snapshot.
+COUNTS = (
+    'steps', 'count', 'bodies', 'score', 'asteroids', 'hostiles',
+    'shells', 'deferred',
+    )
+TIMES = ('time', 'published', 'accumulator')
+
+# What the view and the worker tell each other, at the start of the buffer.
+CONTROLS = ('front', 'held', 'running', 'keys', 'width', 'height')
+
+
+def aligned(size):
+    """Return a number of bytes rounded up to a multiple of 8."""
+    return -(-size // 8) * 8
+
+
+def sounds(body):
+    """Return the sound effects a ship or asteroid can make."""
+    effects = [body.states['exploded']['sfx']]
+    if hasattr(body, 'weaponsound'):
+        effects.append(body.weaponsound)
+    return effects
+
+
+class Snapshot:
+    """The state views draw of a world at one step, laid over a buffer.
+
+    It has the columns and `count` of an `EntityStore`, so a renderer can
+    draw it in place of the world's store.
+
+    Args:
+        buffer (obj): The writable buffer to lay the snapshot over.
+        offset (int): Where in the buffer the snapshot starts.
+        capacity (int): The most bodies the snapshot holds.
+
+    Attributes:
+        counts (numpy.ndarray): The value of each of `COUNTS`.
+        times (numpy.ndarray): The value of each of `TIMES`.
+
+    """
+
+    def __init__(self, buffer, offset, capacity):
+        self.capacity = capacity
+        self.counts = np.ndarray(len(COUNTS), np.int64, buffer, offset)
+        offset += self.counts.nbytes
+        self.times = np.ndarray(len(TIMES), np.float64, buffer, offset)
+        offset += self.times.nbytes
+        for name, dtype in COLUMNS:
+            column = np.ndarray(capacity, dtype, buffer, offset)
+            setattr(self, name, column)
+            offset += aligned(column.nbytes)
+
+    def __getattr__(self, name):
+        if name in COUNTS:
+            return int(self.counts[COUNTS.index(name)])
+        if name in TIMES:
+            return float(self.times[TIMES.index(name)])
+        raise AttributeError(name)
+
+    @staticmethod
+    def size(capacity):
+        """Return the bytes a snapshot of a number of bodies takes up."""
+        size = 8 * (len(COUNTS) + len(TIMES))
+        for name, dtype in COLUMNS:
+            size += aligned(capacity * np.dtype(dtype).itemsize)
+        return size
+
+    def write(self, world, steps, accumulator=0.0):
+        """Copy the state of a world into the snapshot.
+
+        Bodies beyond the snapshot's capacity aren't drawn.
+
+        Args:
+            world (World): The world to copy.
+            steps (int): The number of steps the world has taken.
+            accumulator (float): The seconds the worker has banked towards
+                its next step.
+
+        """
+        store = world.store
+        count = min(store.count, self.capacity)
+        for name, dtype in COLUMNS:
+            getattr(self, name)[:count] = getattr(store, name)[:count]
+        self.counts[:] = (
+            steps,
+            count,
+            store.count,
+            world.score,
+            len(world.asteroids),
+            len(world.hostiles),
+            len(world.shells),
+            world.ai.deferred,
+            )
+        self.times[:] = (world.time, monotonic(), accumulator)
+
+    def alpha(self, step):
+        """Return how far to draw bodies between their last two states.
+
+        Args:
+            step (float): The seconds in each of the worker's steps.
+
+        """
+        banked = self.accumulator + monotonic() - self.published
+        return min(max(banked / step, 0.0), 1.0)
+
+    def translated(self, table):
+        """Return the snapshot with its sprites looked up in a table.
+
+        Args:
+            table (numpy.ndarray): The view's sprite index for each of the
+                worker's.
+
+        Returns:
+            Snapshot: A copy sharing the buffer, or None if the snapshot
+            has sprites the table doesn't have yet.
+
+        """
+        sprite = self.sprite[:self.count]
+        if len(sprite) and sprite.max() >= len(table):
+            return None
+        copy = object.__new__(Snapshot)
+        copy.__dict__.update(self.__dict__)
+        copy.sprite = table[sprite]
+        return copy
+
+
+class Channel:
+    """The control block and the two snapshots the view and worker share.
+
+    Args:
+        buffer (obj): The writable buffer holding everything, at least
+            `Channel.size(capacity)` bytes.
+        capacity (int): The most bodies each snapshot holds.
+        lock (obj): The lock guarding which snapshot is which.
+        messages (obj): The queue messages are sent to the view through.
+
+    Attributes:
+        controls (numpy.ndarray): The value of each of `CONTROLS`. "front"
+            is the latest snapshot, "held" the one the view is using, or
+            -1 for none.
+        snapshots (tuple): The two snapshots.
+
+    """
+
+    def __init__(self, buffer, capacity, lock, messages):
+        self.capacity = capacity
+        self.lock = lock
+        self.messages = messages
+        self.controls = np.ndarray(len(CONTROLS), np.int64, buffer, 0)
+        offset = self.controls.nbytes
+        size = Snapshot.size(capacity)
+        self.snapshots = (
+            Snapshot(buffer, offset, capacity),
+            Snapshot(buffer, offset + size, capacity),
+            )
+
+    @staticmethod
+    def size(capacity):
+        """Return the bytes a channel for a number of bodies takes up."""
+        return 8 * len(CONTROLS) + 2 * Snapshot.size(capacity)
+
+    def control(self, name, value=None):
+        """Return a control's value, setting it first if a value is given."""
+        index = CONTROLS.index(name)
+        if value is not None:
+            self.controls[index] = value
+        return int(self.controls[index])
+
+    def inputs(self):
+        """Return the keys held down and the size of the world."""
+        return unpack_inputs(self.control('keys')), (
+            self.control('width'), self.control('height')
+            )
+
+    def publish(self, world, steps, accumulator=0.0):
+        """Write a world into the snapshot the view isn't using.
+
+        Returns:
+            bool: False if the view still holds the snapshot that would be
+            written, so the world should be published again next step.
+
+        """
+        with self.lock:
+            front, held = self.control('front'), self.control('held')
+            back = 1 - front if front >= 0 else 0
+            if back == held:
+                return False
+        # The view only takes the front snapshot, so the back is safe.
+        self.snapshots[back].write(world, steps, accumulator)
+        with self.lock:
+            self.control('front', 1 - front if front >= 0 else 0)
+        return True
+
+    def acquire(self):
+        """Hold the latest snapshot so it isn't written over.
+
+        Returns:
+            Snapshot: The latest snapshot, or None if there isn't one yet.
+
+        """
+        with self.lock:
+            front = self.control('front')
+            if front < 0:
+                return None
+            self.control('held', front)
+        return self.snapshots[front]
+
+    def release(self):
+        """Let the worker write over the held snapshot again."""
+        with self.lock:
+            self.control('held', -1)
+
+
+def simulate(settings, channel, record=None):
+    """Step a round of combat in real time until the view stops it.
+
+    Args:
+        settings (dict): The round's settings, see `build_world()`. "rate"
+            is the number of steps a second.
+        channel (Channel): Where to read inputs and publish snapshots.
+        record (str): The file to save a `Recorder`'s recording to when
+            the round ends, or None to not record it.
+
+    """
+    inputs, size = channel.inputs()
+    world = build_world(settings, size)
+    recorder = Recorder(**settings) if record else None
+    timestep = FixedTimestep(
+        settings['rate'], settings['physics'].get('max_steps', 5)
+        )
+    seen = set()
+    sprites = 0
+    taken = 0
+    pending = True
+    last = monotonic()
+    while channel.control('running'):
+        now = monotonic()
+        steps = timestep.steps(now - last)
+        last = now
+        inputs, size = channel.inputs()
+
+        messages = []
+        taken += len(steps)
+        for step in steps:
+            world.size = size
+            for name, body in world.step(step, inputs):
+                if name in ('fired', 'exploded'):
+                    sfx = body.sfx if name == 'fired' else sounds(body)[0]
+                    messages.append((name, body.handle, sfx))
+                elif name == 'killed':
+                    messages.append((name, body.handle, None))
+            if recorder is not None:
+                recorder.record(world, inputs)
+
+        # Tell the view about new bodies and sprites before it sees them.
+        for body in world.collidables:
+            if body.handle not in seen:
+                seen.add(body.handle)
+                messages.append(('spawned', body.handle, sounds(body)))
+        new = EntityStore.sprites[sprites:]
+        if new:
+            messages.append(('sprites', sprites, new))
+            sprites += len(new)
+        if messages:
+            channel.messages.put(messages)
+
+        if steps or pending:
+            pending = not channel.publish(
+                world, taken, timestep.accumulator
+                )
+        sleep(max(timestep.step - timestep.accumulator, 0.001))
+
+    if recorder is not None:
+        recorder.save(record)
+
+
+def serve(settings, name, capacity, lock, messages, record=None):
+    """Run `simulate()` in a worker process over a shared memory block."""
+    memory = shared_memory.SharedMemory(name)
+    channel = Channel(memory.buf, capacity, lock, messages)
+    try:
+        simulate(settings, channel, record)
+    except Exception:
+        messages.put([('failed', None, traceback.format_exc())])
+    finally:
+        del channel
+        memory.close()
+
+
+class SimulationWorker:
+    """Step a round of combat on a thread or process of its own.
+
+    Args:
+        settings (dict): The round's settings, see `build_world()`. "rate"
+            is the number of steps a second.
+        size (tuple): The width and height of the world.
+        mode (str): "thread" or "process". A process steps the world on
+            another core.
+        capacity (int): The most bodies each snapshot holds.
+        record (str): The file to save a recording of the round to when it
+            ends, or None to not record it.
+
+    Attributes:
+        channel (Channel): The buffers shared with the worker.
+        memory (SharedMemory): The block holding the channel in process
+            mode, otherwise None.
+        sprites (numpy.ndarray): The view's index for each of the worker
+            process's sprites.
+        step (float): The seconds in each step.
+
+    """
+
+    def __init__(
+        self, settings, size, mode='thread', capacity=8192, record=None,
+    ):
+        if mode not in MODES:
+            raise ValueError('Unknown worker mode "{}".'.format(mode))
+        self.settings = settings
+        self.mode = mode
+        self.record = record
+        self.step = 1.0 / settings['rate']
+        self.sprites = np.zeros(0, dtype=np.intp)
+        self.memory = None
+        self.runner = None
+
+        if mode == 'process':
+            self.context = multiprocessing.get_context('spawn')
+            self.memory = shared_memory.SharedMemory(
+                create=True, size=Channel.size(capacity)
+                )
+            buffer = self.memory.buf
+            lock, messages = self.context.Lock(), self.context.Queue()
+        else:
+            buffer = bytearray(Channel.size(capacity))
+            lock, messages = threading.Lock(), queue.Queue()
+        self.channel = Channel(buffer, capacity, lock, messages)
+        self.channel.controls[:] = (-1, -1, 1, 0) + tuple(map(int, size))
+
+    def start(self):
+        """Start stepping the world."""
+        channel = self.channel
+        if self.mode == 'process':
+            self.runner = self.context.Process(
+                target=serve,
+                args=(
+                    self.settings, self.memory.name, channel.capacity,
+                    channel.lock, channel.messages, self.record,
+                    ),
+                daemon=True,
+                )
+        else:
+            self.runner = threading.Thread(
+                target=self.run, name='simulation', daemon=True
+                )
+        self.runner.start()
+
+    def run(self):
+        """Run `simulate()` on the worker thread."""
+        try:
+            simulate(self.settings, self.channel, self.record)
+        except Exception:
+            self.channel.messages.put(
+                [('failed', None, traceback.format_exc())]
+                )
+
+    def stop(self, timeout=1.0):
+        """Stop stepping the world and free the shared buffers."""
+        self.channel.control('running', 0)
+        if self.runner is not None:
+            self.runner.join(timeout)
+            if self.mode == 'process' and self.runner.is_alive():
+                self.runner.terminate()
+            self.runner = None
+        if self.memory is not None:
+            self.channel = None
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def steer(self, inputs, size):
+        """Pass on the keys held down and the size of the world."""
+        channel = self.channel
+        channel.control('keys', pack_inputs(inputs))
+        channel.control('width', int(size[0]))
+        channel.control('height', int(size[1]))
+
+    def messages(self):
+        """Return the messages sent since the last call, oldest first.
+
+        Raises:
+            RuntimeError: If the worker stopped with an error or exited.
+
+        """
+        received = []
+        while True:
+            try:
+                received.extend(self.channel.messages.get_nowait())
+            except queue.Empty:
+                break
+        for name, handle, data in received:
+            if name == 'sprites' and self.mode == 'process':
+                table = np.array(
+                    [EntityStore.sprite_id(tuple(item)) for item in data],
+                    dtype=np.intp,
+                    )
+                self.sprites = np.concatenate((self.sprites[:handle], table))
+            elif name == 'failed':
+                raise RuntimeError('The simulation stopped:\n' + data)
+        if not self.runner.is_alive():
+            raise RuntimeError('The simulation worker exited unexpectedly.')
+        return received
+
+    def acquire(self):
+        """Hold the latest snapshot until `release()` is called.
+
+        Returns:
+            Snapshot: The latest snapshot, or None if there isn't one yet.
+
+        """
+        snapshot = self.channel.acquire()
+        if snapshot is not None and self.mode == 'process':
+            # Sprites are numbered in the order each process first saw them.
+            snapshot = snapshot.translated(self.sprites)
+        return snapshot
+
+    def release(self):
+        """Let the worker write over the held snapshot again."""
+        self.channel.release()
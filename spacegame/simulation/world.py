@@ -0,0 +1,533 @@
+"""A headless combat simulation that can be stepped without a window.
+
+The world owns every body in a round of combat and moves, fires and
+collides them each time it is stepped. It never imports Kivy, so it can run
+thousands of steps a second from a script. `CombatScreen` steps a world and
+mirrors it into widgets. For example::
+
+    from spacegame.simulation.waves import WaveScheduler, load_level
+    from spacegame.simulation.world import World
+
+    world = World(size=(800, 600), seed=1)
+    world.spawn_player('fast')
+    world.waves = WaveScheduler(load_level(1))
+    for tick in range(600):
+        events = world.step(1.0/60.0, inputs={'w', 'spacebar'})
+
+"""
+from random import Random
+
+import numpy as np
+
+from spacegame import tracing
+from spacegame.simulation.ai import AIScheduler
+from spacegame.simulation.bodies import Asteroid, Hostile, Player
+from spacegame.simulation.collisions import SpatialHash, sweep
+from spacegame.simulation.entities import HandleTable, Roster
+from spacegame.simulation.pools import ShellPool
+from spacegame.simulation.profiling import Profiler
+from spacegame.simulation.store import EntityStore
+from spacegame.simulation.timers import TimerWheel
+from spacegame.simulation.waves import WaveScheduler, load_level
+from spacegame.tracing import DEBUG
+
+# Speeds in the data are in pixels per 60th of a second.
+FRAME = 1.0/60.0
+
+FIRED = tracing.event('Weapons', '"{}" fired "{}".')
+
+
+class World:
+    """Every body in a round of combat and the rules that move them.
+
+    Each step returns the events that happened during it so a view can play
+    sounds or show popups. Bodies that leave play during a step are only
+    taken out of the rosters in one pass at the end of it, see `reap()`, and
+    stay readable in the store until the start of the next step. Exploded
+    bodies stop and stay in the store for `explosion_time` seconds so views
+    can show the explosion. Bodies move
+    the same distance each second whatever size the steps are, but views
+    should step the world at a fixed rate, see `FixedTimestep`. Events are
+    (name, body) tuples:
+
+        fired - A ship fired the shell.
+        removed - The shell hit something or left the world.
+        exploded - The body was destroyed.
+        killed - The player was shot down.
+
+    Args:
+        size (tuple): The width and height of the world.
+        physics (dict): Movement modifiers, see `spacegame.config.physics`.
+        difficulty (str): The difficulty to load hostile ships at.
+        seed (int): Seeds the world's random number generator.
+        pool_size (int): The number of shells to build up front for each
+            type of weapon.
+        profiler (Profiler): Times the phases of each step. Defaults to a
+            disabled profiler.
+        ai (AIScheduler): Chooses the hostile ships that think each step.
+            Defaults to every ship thinking every step.
+
+    Attributes:
+        ai (AIScheduler): Chooses the hostile ships that think each step.
+        asteroids (Roster): The asteroids still in play.
+        dead (list): The bodies to remove from the store next step.
+        doomed (list): The bodies to take out of play at the end of the
+            step.
+        entities (HandleTable): Every body in the store by handle.
+        events (list): The events from the last step.
+        explosion_time (float): The number of seconds explosions are shown.
+        hostiles (Roster): The hostile ships still in play.
+        player (Player): The player's ship.
+        pools (dict): The shell pools for each type of weapon.
+        profiler (Profiler): Times the phases of each step.
+        random (random.Random): The world's random number generator.
+        rng (numpy.random.Generator): Rolls the AI's decisions, seeded from
+            `random`.
+        score (int): The number of things the player has shot.
+        shells (Roster): The shells in flight.
+        store (EntityStore): The motion state of every body.
+        time (float): The number of seconds simulated so far.
+        timers (TimerWheel): The handles of the exploded bodies, due when
+            their explosions are over.
+        waves (WaveScheduler): Spawns the level's bodies, or None.
+
+    """
+
+    def __init__(
+        self, size=(800, 600), physics=None, difficulty='medium', seed=None,
+        pool_size=8, profiler=None, ai=None,
+    ):
+        self.size = tuple(size)
+        self.physics = physics or {}
+        self.difficulty = difficulty
+        self.random = Random(seed)
+        self.rng = np.random.default_rng(self.random.getrandbits(64))
+        self.grid = SpatialHash(self.physics.get('cell_size', 100))
+        self.store = EntityStore()
+        self.pool_size = pool_size
+        self.pools = {}
+        if profiler is None:
+            profiler = Profiler(enabled=False)
+        self.profiler = profiler
+        if ai is None:
+            ai = AIScheduler()
+        self.ai = ai
+        self.entities = HandleTable()
+        self.timers = TimerWheel(FRAME)
+        self.doomed = []
+        self.dead = []
+        self.leaving = []
+        self.explosion_time = 0.3
+        self.player = None
+        self.hostiles = Roster()
+        self.asteroids = Roster()
+        self.shells = Roster()
+        self.events = []
+        self.score = 0
+        self.time = 0.0
+        self.waves = None
+
+    @property
+    def collidables(self):
+        """list: The ships and asteroids that can be hit."""
+        collidables = list(self.asteroids)
+        if self.player is not None and not self.player.destroyed:
+            collidables.append(self.player)
+        collidables.extend(self.hostiles)
+        return collidables
+
+    def bodies(self):
+        """Return every body in play, shells included."""
+        return self.collidables + self.shells
+
+    def start(self, shiptype='basic', level=1, spawn_budget=2):
+        """Spawn the player and schedule the waves of a level.
+
+        Args:
+            shiptype (str): The key in data/ships/players.py to load.
+            level (int): The level in spacegame/data/levels to play.
+            spawn_budget (int): The most bodies the level spawns each step.
+
+        """
+        self.spawn_player(shiptype)
+        self.waves = WaveScheduler(load_level(level), spawn_budget)
+
+    def spawn_player(self, type='basic', pos=(0, 0)):
+        """Put the player's ship into the world.
+
+        Args:
+            type (str): The key in data/ships/players.py to load.
+            pos (tuple): Where to put the ship.
+
+        """
+        self.player = self.track(
+            Player(type=type, store=self.store, pos=pos)
+            )
+        self.shell_pool(self.player)
+        return self.player
+
+    def spawn_hostile(self, type='basic', pos=None):
+        """Put a hostile ship into the world.
+
+        Args:
+            type (str): The key in data/ships/hostiles.py to load.
+            pos (tuple): Where to put the ship. Defaults to somewhere away
+                from the player.
+
+        """
+        if pos is None:
+            pos = self.spawn_position()
+        hostile = Hostile(
+            type=type, difficulty=self.difficulty, store=self.store, pos=pos
+            )
+        self.track(hostile, self.hostiles)
+        self.shell_pool(hostile)
+        return hostile
+
+    def spawn_asteroid(self, type='lg_asteroid', pos=None):
+        """Put an asteroid into the world on a random trajectory.
+
+        Args:
+            type (str): The key in data/objects/obstacles.py to load.
+            pos (tuple): Where to put the asteroid. Defaults to somewhere
+                away from the player.
+
+        """
+        if pos is None:
+            pos = self.spawn_position()
+        asteroid = Asteroid(type=type, store=self.store, pos=pos)
+        asteroid.randomize_trajectory(self.random)
+        return self.track(asteroid, self.asteroids)
+
+    def track(self, body, roster=None):
+        """Give a body a handle and put it in play.
+
+        Args:
+            body (Body): The body new to the world's store.
+            roster (Roster): The roster to add the body to, if any.
+
+        """
+        body.handle = self.entities.add(body)
+        if roster is not None:
+            roster.add(body)
+        return body
+
+    def spawn_position(self):
+        """Return a random position away from the player."""
+        width, height = self.size
+        player = (0, 0)
+        if self.player is not None and not self.player.destroyed:
+            player = self.player.pos
+        randint = self.random.randint
+        positions = []
+        while len(positions) < 10:
+            location = (randint(1, width), randint(1, height))
+            if abs(player[0] - location[0]) < 100:
+                pass
+            elif abs(player[1] - location[1]) < 100:
+                pass
+            else:
+                positions.append(location)
+        return self.random.choice(positions)
+
+    def step(self, dt, inputs=(), thinking=None):
+        """Step the world forward.
+
+        Args:
+            dt (float): The number of seconds to step.
+            inputs (set): The names of the keys the player is pressing, e.g.
+                "w" or "spacebar".
+            thinking (int): The number of AI ships to steer, e.g. when
+                replaying a step. Defaults to as many as the AI's budget
+                allows.
+
+        Returns:
+            list: The events that happened during the step.
+
+        """
+        lap = self.profiler.lap
+        self.events = []
+        self.time += dt
+        self.remove_dead()
+        self.store.snapshot()
+        lap('cleanup')
+
+        # Bring in the level's bodies that are due.
+        if self.waves is not None:
+            self.waves.spawn(self)
+        lap('spawning')
+
+        # First, step time forward and steer the ships.
+        player = self.player
+        if player is not None and not player.destroyed:
+            player.lastfired += dt
+            self.accelerate_hero(player, dt, inputs)
+        lap('input')
+        self.ai.run(self, dt, thinking)
+        lap('ai')
+
+        # Next, move the bodies around the world.
+        self.move(dt)
+        lap('movement')
+
+        # Finally, check for any collisions, then drop the shells that left
+        # the world without hitting anything on the way out.
+        self.detect_collisions()
+        self.drop_leaving()
+        self.reap()
+        lap('collisions')
+        return self.events
+
+    def shell_pool(self, ship):
+        """Return the pool of shells for a ship's weapons."""
+        key = (ship.origin, ship.weapontype)
+        try:
+            return self.pools[key]
+        except KeyError:
+            pool = ShellPool(
+                type=ship.weapontype,
+                dataset=ship.weapons,
+                origin=ship.origin,
+                store=self.store,
+                size=self.pool_size,
+                )
+            self.pools[key] = pool
+            return pool
+
+    def fire(self, ship):
+        """Fire a ship's weapons and track the shell if one was fired."""
+        shell = ship.fire(self.shell_pool(ship))
+        if shell is not None:
+            self.track(shell, self.shells)
+            self.events.append(('fired', shell))
+            if DEBUG:
+                tracing.trace(FIRED, ship, shell)
+
+    def accelerate_hero(self, ship, unit, inputs):
+        """Calculate the acceleration changes based on the keys pressed."""
+        minspeed = 0
+        rotation = 0
+        speed = ship.speed
+        topspeed = ship.stats.speed
+
+        # Acceleration and turning are configs that modify movement overall.
+        acceleration = self.physics.get('acceleration', 0.25)
+        turning = self.physics.get('turning', 25)
+
+        # Make rotation dependent on speed.
+        angle_delta = turning * unit * topspeed
+        # Make acceleration dependent on speed.
+        speed_delta = acceleration * unit * topspeed
+
+        if "w" in inputs:
+            if speed < topspeed:
+                speed = min(topspeed, speed + speed_delta)
+        if "s" in inputs:
+            if speed > minspeed:
+                speed = max(minspeed, speed - speed_delta)
+        if "a" in inputs:
+            rotation += angle_delta
+        if "d" in inputs:
+            rotation -= angle_delta
+        if "spacebar" in inputs:
+            self.fire(ship)
+
+        ship.angle += rotation
+        ship.speed = speed
+
+    def steer_hostiles(self, rows, unit, dt):
+        """Randomly turn, speed up, slow down or fire hostile ships.
+
+        Every ship rolls its action at once from arrays of the store's
+        columns, so hundreds of ships cost a handful of NumPy operations
+        instead of a Python call each. Only the ships that fire are handled
+        one at a time.
+
+        A ship has a 1 in 100 chance of firing each step, so a ship that
+        hasn't thought for several steps rolls for all of them at once.
+
+        Args:
+            rows (numpy.ndarray): The store rows of the ships to steer.
+            unit (numpy.ndarray): The seconds to steer each ship for.
+            dt (float): The number of seconds being stepped.
+
+        """
+        store = self.store
+        store.lastfired[rows] += unit
+
+        # Acceleration and turning are configs that modify movement overall.
+        acceleration = self.physics.get('acceleration', 0.25)
+        turning = self.physics.get('turning', 25)
+
+        topspeed = store.topspeed[rows]
+        speed = store.speed[rows]
+        # Make rotation dependent on speed.
+        angle_delta = turning * unit * topspeed
+        # Make acceleration dependent on speed.
+        speed_delta = acceleration * unit * topspeed
+
+        action = self.rng.integers(1, 101, len(rows))
+        left = action < 20
+        right = (action >= 20) & (action < 40)
+        faster = (action >= 40) & (action < 80) & (speed < topspeed)
+        slower = (action >= 80) & (action < 90) & (speed > 0)
+
+        store.angle[rows] += angle_delta * (left.astype(float) - right)
+        speed = np.where(
+            faster, np.minimum(topspeed, speed + speed_delta), speed
+            )
+        speed = np.where(slower, np.maximum(0, speed - speed_delta), speed)
+        store.speed[rows] = speed
+
+        chance = 1 - 0.99 ** (unit / dt)
+        owners = store.owners
+        for row in rows[self.rng.random(len(rows)) < chance]:
+            self.fire(owners[row])
+
+    def move(self, dt):
+        """Move every body and note the shells that left the world."""
+        offscreen = self.store.integrate(self.size, dt / FRAME)
+        owners = self.store.owners
+        self.leaving = [owners[row] for row in offscreen]
+
+    def drop_leaving(self):
+        """Take the shells that left the world and hit nothing out of play."""
+        for shell in self.leaving:
+            if not shell.destroyed:
+                self.remove_shell(shell)
+        self.leaving = []
+
+    def remove_shell(self, shell):
+        """Take a shell out of play at the end of the step."""
+        shell.destroyed = True
+        self.doomed.append(shell)
+        self.events.append(('removed', shell))
+
+    def reap(self):
+        """Take the bodies that left play during the step out of it.
+
+        Doomed bodies are swapped out of their rosters, so a cascade of
+        explosions costs the same per body however many are in play. Spent
+        shells and the bodies whose explosions are over lose their handles
+        and are freed from the store at the start of the next step.
+
+        """
+        entities, dead = self.entities, self.dead
+        for body in self.doomed:
+            if body.roster is not None:
+                body.roster.discard(body)
+            if body.pool is not None:  # Shells don't linger.
+                entities.remove(body.handle)
+                dead.append(body)
+        self.doomed.clear()
+
+        for handle in self.timers.advance(self.time):
+            body = entities.get(handle)
+            if body is not None:
+                entities.remove(handle)
+                dead.append(body)
+
+    def remove_dead(self):
+        """Free the bodies that left play, recycling shells."""
+        for body in self.dead:
+            if body.pool is not None:
+                body.pool.release(body)
+            else:
+                self.store.remove(body)
+        self.dead.clear()
+
+    def detect_collisions(self):
+        """Explode anything that touches another body or a shell."""
+        grid = self.grid
+        grid.clear()
+        for body in self.collidables:
+            grid.insert(body, *body.swept_bounds)
+
+        # Check the ships and asteroids against their neighbours.
+        for body, other in grid.pairs():
+            if body.destroyed or other.destroyed:
+                continue  # It blew up earlier in this pass.
+            if body.collide(other):
+                self.explode(body, other)
+
+        # Check the path of each shell in flight against nearby ships and
+        # asteroids. Each shell hits whatever it reached first.
+        shells = tuple(self.shells)
+        indices, targets = [], []
+        for index, shell in enumerate(shells):
+            if shell.destroyed:
+                continue  # It already hit something.
+            for body in grid.query(*shell.swept_bounds):
+                if body.destroyed or body.origin == shell.origin:
+                    continue  # Nothing to hit or friendly fire.
+                indices.append(index)
+                targets.append(body)
+        if not targets:
+            return
+
+        indices = np.array(indices)
+        shell_rows = np.array([shells[index].row for index in indices])
+        body_rows = np.array([body.row for body in targets])
+        times = self.hit_times(shell_rows, body_rows)
+        hits = np.flatnonzero(times < np.inf)
+        spent = set()
+        for pair in hits[np.lexsort((times[hits], indices[hits]))]:
+            index, body = indices[pair], targets[pair]
+            if index in spent or body.destroyed:
+                continue  # Blown up by an earlier shell.
+            spent.add(index)
+
+            shell = shells[index]
+            self.explode(body)
+            self.remove_shell(shell)
+            if body is self.player:
+                self.events.append(('killed', body))
+            elif shell.origin == 'player':
+                self.score += 1
+
+    def hit_times(self, shells, bodies):
+        """Return when during the last step shells hit bodies.
+
+        Both moved in straight lines, so each shell's move is taken relative
+        to its body and swept against the circles around both of their
+        centres. Hits are found however far the shell moved in the step, so
+        shells can't skip through targets when the simulation rate is low.
+
+        Args:
+            shells (numpy.ndarray): The store row of the shell of each pair.
+            bodies (numpy.ndarray): The store row of the body of each pair.
+
+        Returns:
+            numpy.ndarray: The fraction of the step at which each pair first
+            touched, or infinity if they didn't.
+
+        """
+        store = self.store
+        prev_x, prev_y, x, y = store.prev_x, store.prev_y, store.x, store.y
+        width, height = store.width, store.height
+
+        # Where the centre of each shell started and went, from its body's.
+        start_x = prev_x[shells] - prev_x[bodies]
+        start_y = prev_y[shells] - prev_y[bodies]
+        start_x += (width[shells] - width[bodies]) / 2
+        start_y += (height[shells] - height[bodies]) / 2
+        dx = x[shells] - prev_x[shells] - x[bodies] + prev_x[bodies]
+        dy = y[shells] - prev_y[shells] - y[bodies] + prev_y[bodies]
+        radius = store.radius[shells] + store.radius[bodies]
+        return sweep(start_x, start_y, dx, dy, radius)
+
+    def explode(self, *bodies):
+        """Blow up bodies and take them out of play at the end of the step.
+
+        The store keeps them until their explosions are over.
+
+        """
+        due = self.time + self.explosion_time
+        for body in bodies:
+            body.destroyed = True
+            body.ai = False
+            body.skin = body.states['exploded']['skin']
+            body.speed = 0
+            self.doomed.append(body)
+            self.timers.schedule(due, body.handle)
+            self.events.append(('exploded', body))
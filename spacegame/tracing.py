@@ -0,0 +1,191 @@
+"""Record what the game is doing without paying for it in release runs.
+
+`Logger.debug('...'.format(...))` builds its message even when debug logging
+is off. Tracing gates every call behind a constant that is fixed when the
+game starts, and never formats anything until a message is read. For
+example::
+
+    from spacegame import tracing
+    from spacegame.tracing import DEBUG
+
+    FIRED = tracing.event('Weapons', '"{}" fired "{}".')
+
+    if DEBUG:
+        tracing.trace(FIRED, ship, shell)
+
+Events are packed into a fixed size ring buffer of binary records, so the
+most recent ones can be dumped when the game crashes or a key is pressed.
+Set the environment variable `SPACEDOUT_TRACE` to "debug", "info" or "off"
+to choose what is recorded, and `SPACEDOUT_TRACE_ECHO` to also send each
+event to the log as it happens.
+
+Attributes:
+    DEBUG (bool): True if debug events are recorded.
+    INFO (bool): True if info events are recorded.
+    LEVEL (int): The lowest level of event that is recorded.
+    ECHO (bool): True if events are logged as they are recorded.
+
+"""
+import logging
+import struct
+import sys
+import time
+from os import environ, makedirs, path
+
+DEBUG_LEVEL = 10
+INFO_LEVEL = 20
+OFF_LEVEL = 100
+
+levels = {'debug': DEBUG_LEVEL, 'info': INFO_LEVEL, 'off': OFF_LEVEL}
+
+logger = logging.getLogger('kivy')
+
+try:
+    LEVEL = levels[environ.get('SPACEDOUT_TRACE', 'info').lower()]
+except KeyError:
+    logger.warning(
+        'Tracing: SPACEDOUT_TRACE should be one of {}, not "{}". '
+        'Using "info".'.format(', '.join(levels), environ['SPACEDOUT_TRACE'])
+        )
+    LEVEL = INFO_LEVEL
+DEBUG = LEVEL <= DEBUG_LEVEL
+INFO = LEVEL <= INFO_LEVEL
+ECHO = bool(environ.get('SPACEDOUT_TRACE_ECHO'))
+
+# A record is the time, the event, which arguments are strings and up to
+# three arguments. Strings are stored as their index in `strings`.
+RECORD = struct.Struct('<dHB3d')
+MAX_ARGS = 3
+
+# The number of records kept. Older records are overwritten.
+CAPACITY = 4096
+
+# The records, and the number of records written since the game started.
+buffer = bytearray(RECORD.size * CAPACITY)
+written = 0
+
+# The (title, message, level) of every event.
+events = []
+
+# Every string an event has been recorded with, and the index of each.
+strings = []
+string_ids = {}
+
+
+def event(title, message, level=DEBUG_LEVEL):
+    """Register a kind of event and return its id.
+
+    Args:
+        title (str): What the event is about, e.g. "Entities".
+        message (str): A format string filled in with the event's arguments.
+        level (int): `DEBUG_LEVEL` or `INFO_LEVEL`.
+
+    """
+    events.append((title, message, level))
+    return len(events) - 1
+
+
+def string_id(value):
+    """Return the index of a string in `strings`, adding it if it's new."""
+    try:
+        return string_ids[value]
+    except KeyError:
+        string_ids[value] = len(strings)
+        strings.append(value)
+        return string_ids[value]
+
+
+def trace(event_id, *args):
+    """Record an event in the ring buffer.
+
+    Callers check `DEBUG` or `INFO` first, so nothing here runs for levels
+    that aren't being recorded. Events below `LEVEL` are dropped before any
+    of their arguments are turned into strings.
+
+    Args:
+        event_id (int): The id returned by `event()`.
+        *args: Up to three numbers or objects to fill the message in with.
+            Anything that isn't a number is recorded as its string.
+
+    """
+    global written
+    if events[event_id][2] < LEVEL:
+        return
+
+    mask = 0
+    values = [0.0] * MAX_ARGS
+    for index, arg in enumerate(args[:MAX_ARGS]):
+        if isinstance(arg, (int, float)):
+            values[index] = arg
+        else:
+            mask |= 1 << index
+            values[index] = string_id(str(arg))
+
+    offset = RECORD.size * (written % CAPACITY)
+    RECORD.pack_into(
+        buffer, offset, time.time(), event_id, mask, *values
+        )
+    written += 1
+
+    if ECHO:
+        logger.log(events[event_id][2], format_record(offset))
+
+
+def format_record(offset):
+    """Return the message of the record at an offset in the buffer."""
+    timestamp, event_id, mask, *values = RECORD.unpack_from(buffer, offset)
+    title, message, level = events[event_id]
+    args = [
+        strings[int(value)] if mask & (1 << index) else value
+        for index, value in enumerate(values)
+        ]
+    return '{}: {}'.format(title, message.format(*args))
+
+
+def records():
+    """Return the (time, message) of each recorded event, oldest first."""
+    count = min(written, CAPACITY)
+    first = written - count
+    lines = []
+    for index in range(first, written):
+        offset = RECORD.size * (index % CAPACITY)
+        timestamp = RECORD.unpack_from(buffer, offset)[0]
+        lines.append((timestamp, format_record(offset)))
+    return lines
+
+
+def dump(filename):
+    """Write every recorded event to a text file, oldest first.
+
+    Args:
+        filename (str): The file to write.
+
+    """
+    makedirs(path.dirname(filename) or '.', exist_ok=True)
+    with open(filename, 'w') as output:
+        for timestamp, message in records():
+            stamp = time.strftime('%H:%M:%S', time.localtime(timestamp))
+            fraction = '{:.3f}'.format(timestamp % 1)[1:]
+            output.write('{}{} {}\n'.format(stamp, fraction, message))
+    return filename
+
+
+def dump_on_crash(filename):
+    """Dump the recorded events when an exception goes uncaught.
+
+    Args:
+        filename (str): The file to write.
+
+    """
+    excepthook = sys.excepthook
+
+    def crashed(*exc_info):
+        try:
+            dump(filename)
+            logger.critical('Tracing: Recent events written to "{}".'.format(
+                filename
+                ))
+        finally:
+            excepthook(*exc_info)
+
+    sys.excepthook = crashed
@@ -0,0 +1,34 @@
+"""Check that thinking less often doesn't change how the AI ships behave."""
+from spacegame.simulation.ai import AIScheduler
+from spacegame.simulation.world import World
+
+
+def shots_fired(interval, seed, count=25, steps=1200):
+    """Return the shots fired by hostile ships thinking every `interval`.
+
+    The ships are spread out across a large world so none of them collide
+    and every ship has the whole round to fire.
+
+    """
+    ai = AIScheduler(
+        intervals={'near': interval, 'visible': interval, 'hidden': interval},
+        )
+    world = World(size=(20000, 20000), seed=seed, pool_size=8, ai=ai)
+    for index in range(count):
+        row, column = divmod(index, 5)
+        world.spawn_hostile(
+            'basic', pos=(column * 4000 + 2000, row * 4000 + 2000),
+            )
+
+    fired = 0
+    for step in range(steps):
+        for name, body in world.step(1.0 / 60.0):
+            fired += name == 'fired'
+    assert len(world.hostiles) == count
+    return fired
+
+
+def test_ships_that_think_less_often_fire_as_often():
+    every_step = sum(shots_fired(1, seed) for seed in range(3))
+    every_fourth = sum(shots_fired(4, seed) for seed in range(3))
+    assert abs(every_fourth - every_step) < 0.1 * every_step